@@ -5,14 +5,21 @@ Analiza la base de datos para recomendar distribución de fondos
 """
 
 import argparse
+import sys
 from colorama import init, Fore, Style
 from arbitrage_db import ArbitrageDatabase
-from datetime import datetime
+from typing import List, Optional
 
 # Inicializar colorama
 init(autoreset=True)
 
-def display_exchange_recommendations(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7):
+# Color e ícono según la posición del exchange (top 15)
+EXCHANGE_TIERS = [
+    (Fore.GREEN, "🥇"), (Fore.GREEN, "🥈"), (Fore.GREEN, "🥉"),
+    (Fore.YELLOW, "⭐"), (Fore.YELLOW, "⭐")
+] + [(Fore.WHITE, "  ")] * 10
+
+def display_exchange_recommendations(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7, stats: Optional[List] = None):
     """Muestra recomendaciones de exchanges para distribuir fondos"""
     
     print(f"\n{Fore.CYAN}{'='*80}")
@@ -20,7 +27,8 @@ def display_exchange_recommendations(db: ArbitrageDatabase, fiat: str = "PEN", d
     print(f"{Fore.CYAN}Análisis de los últimos {days} días")
     print(f"{Fore.CYAN}{'='*80}\n")
     
-    stats = db.get_exchange_statistics(fiat, days)
+    if stats is None:
+        stats = db.get_exchange_statistics(fiat, days)
     
     if not stats:
         print(f"{Fore.YELLOW}⚠️  No hay datos suficientes para {fiat}")
@@ -30,23 +38,16 @@ def display_exchange_recommendations(db: ArbitrageDatabase, fiat: str = "PEN", d
     print(f"{Fore.WHITE}{'Exchange':<25} {'Compras':<12} {'Ventas':<12} {'Total':<10} {'Spread Prom':<15}")
     print(f"{Fore.CYAN}{'-'*80}")
     
-    for i, stat in enumerate(stats[:15], 1):
-        # Determinar importancia
-        if i <= 3:
-            color = Fore.GREEN
-            icon = "🥇" if i == 1 else "🥈" if i == 2 else "🥉"
-        elif i <= 5:
-            color = Fore.YELLOW
-            icon = "⭐"
-        else:
-            color = Fore.WHITE
-            icon = "  "
-        
-        print(f"{color}{icon} {stat['exchange']:<23} "
-              f"{stat['times_best_buy']:<12} "
-              f"{stat['times_best_sell']:<12} "
-              f"{stat['total_opportunities']:<10} "
-              f"{stat['avg_spread']:.2f}%")
+    # Una sola escritura a stdout para toda la tabla
+    lines = [
+        f"{color}{icon} {stat.exchange:<23} "
+        f"{stat.times_best_buy:<12} "
+        f"{stat.times_best_sell:<12} "
+        f"{stat.total_opportunities:<10} "
+        f"{stat.avg_spread:.2f}%\n"
+        for (color, icon), stat in zip(EXCHANGE_TIERS, stats)
+    ]
+    sys.stdout.write(''.join(lines))
     
     print(f"\n{Fore.GREEN}📊 INTERPRETACIÓN:")
     print(f"{Fore.WHITE}• {Fore.CYAN}Compras{Fore.WHITE}: Veces que este exchange tuvo el mejor precio de compra")
@@ -57,10 +58,10 @@ def display_exchange_recommendations(db: ArbitrageDatabase, fiat: str = "PEN", d
     top_3 = stats[:3]
     print(f"{Fore.WHITE}Para maximizar oportunidades de arbitraje en {fiat}, considera tener fondos en:")
     for i, stat in enumerate(top_3, 1):
-        print(f"{Fore.GREEN}  {i}. {stat['exchange']}")
+        print(f"{Fore.GREEN}  {i}. {stat.exchange}")
     print()
 
-def display_best_pairs(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7):
+def display_best_pairs(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7, pairs: Optional[List] = None):
     """Muestra los mejores pares de exchanges para arbitraje"""
     
     print(f"\n{Fore.CYAN}{'='*80}")
@@ -68,7 +69,8 @@ def display_best_pairs(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7):
     print(f"{Fore.CYAN}Últimos {days} días")
     print(f"{Fore.CYAN}{'='*80}\n")
     
-    pairs = db.get_best_pairs(fiat, days, limit=10)
+    if pairs is None:
+        pairs = db.get_best_pairs(fiat, days, limit=10)
     
     if not pairs:
         print(f"{Fore.YELLOW}⚠️  No hay datos de pares para {fiat}\n")
@@ -82,15 +84,15 @@ def display_best_pairs(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7):
             color = Fore.WHITE
             icon = "💡"
         
-        print(f"{color}{icon} #{i} {pair['coin']}")
-        print(f"   Comprar en:  {Fore.CYAN}{pair['buy_exchange']:<30}")
-        print(f"   Vender en:   {Fore.MAGENTA}{pair['sell_exchange']:<30}")
-        print(f"   {Fore.WHITE}Frecuencia: {pair['frequency']} veces | "
-              f"Spread prom: {pair['avg_spread']:.2f}% | "
-              f"Ganancia prom: {pair['avg_profit']:.2f} {fiat}")
+        print(f"{color}{icon} #{i} {pair.coin}")
+        print(f"   Comprar en:  {Fore.CYAN}{pair.buy_exchange:<30}")
+        print(f"   Vender en:   {Fore.MAGENTA}{pair.sell_exchange:<30}")
+        print(f"   {Fore.WHITE}Frecuencia: {pair.frequency} veces | "
+              f"Spread prom: {pair.avg_spread:.2f}% | "
+              f"Ganancia prom: {pair.avg_profit:.2f} {fiat}")
         print()
 
-def display_coin_statistics(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7):
+def display_coin_statistics(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7, coins: Optional[List] = None):
     """Muestra estadísticas por criptomoneda"""
     
     print(f"\n{Fore.CYAN}{'='*80}")
@@ -98,7 +100,8 @@ def display_coin_statistics(db: ArbitrageDatabase, fiat: str = "PEN", days: int
     print(f"{Fore.CYAN}Últimos {days} días")
     print(f"{Fore.CYAN}{'='*80}\n")
     
-    coins = db.get_coin_statistics(fiat, days)
+    if coins is None:
+        coins = db.get_coin_statistics(fiat, days)
     
     if not coins:
         print(f"{Fore.YELLOW}⚠️  No hay datos de monedas para {fiat}\n")
@@ -108,44 +111,46 @@ def display_coin_statistics(db: ArbitrageDatabase, fiat: str = "PEN", days: int
     print(f"{Fore.CYAN}{'-'*60}")
     
     for coin in coins:
-        print(f"{Fore.GREEN}{coin['coin']:<10} "
-              f"{Fore.WHITE}{coin['opportunities_count']:<15} "
-              f"{coin['avg_spread']:.2f}%{' '*10} "
-              f"{coin['max_spread']:.2f}%")
+        print(f"{Fore.GREEN}{coin.coin:<10} "
+              f"{Fore.WHITE}{coin.opportunities_count:<15} "
+              f"{coin.avg_spread:.2f}%{' '*10} "
+              f"{coin.max_spread:.2f}%")
     
     print(f"\n{Fore.YELLOW}💡 TIP:")
     best_coin = coins[0]
-    print(f"{Fore.WHITE}La moneda con más oportunidades es {Fore.GREEN}{best_coin['coin']}{Fore.WHITE} "
-          f"con {best_coin['opportunities_count']} oportunidades detectadas\n")
+    print(f"{Fore.WHITE}La moneda con más oportunidades es {Fore.GREEN}{best_coin.coin}{Fore.WHITE} "
+          f"con {best_coin.opportunities_count} oportunidades detectadas\n")
 
-def display_recent_opportunities(db: ArbitrageDatabase, fiat: str = "PEN", hours: int = 24):
+def display_recent_opportunities(db: ArbitrageDatabase, fiat: str = "PEN", hours: int = 24, min_spread: float = 0.0):
     """Muestra oportunidades recientes"""
     
     print(f"\n{Fore.CYAN}{'='*80}")
     print(f"{Fore.GREEN}🕐 OPORTUNIDADES RECIENTES - {fiat}")
-    print(f"{Fore.CYAN}Últimas {hours} horas")
+    if min_spread > 0:
+        print(f"{Fore.CYAN}Últimas {hours} horas (spread >= {min_spread}%)")
+    else:
+        print(f"{Fore.CYAN}Últimas {hours} horas")
     print(f"{Fore.CYAN}{'='*80}\n")
     
-    opportunities = db.get_recent_opportunities(fiat, hours, limit=20)
+    opportunities = db.get_recent_opportunities(fiat, hours, limit=10, min_spread=min_spread)
     
     if not opportunities:
         print(f"{Fore.YELLOW}⚠️  No hay oportunidades recientes para {fiat}\n")
         return
     
-    for i, opp in enumerate(opportunities[:10], 1):
-        timestamp = datetime.fromisoformat(opp['timestamp'])
-        time_str = timestamp.strftime('%H:%M:%S')
+    for i, opp in enumerate(opportunities, 1):
+        time_str = opp.timestamp.strftime('%H:%M:%S')
         
-        if opp['spread_percentage'] >= 2:
+        if opp.spread_percentage >= 2:
             color = Fore.GREEN
             icon = "🔥"
         else:
             color = Fore.WHITE
             icon = "💡"
         
-        print(f"{color}{icon} [{time_str}] {opp['coin']}/{fiat}")
-        print(f"   {opp['buy_exchange']} → {opp['sell_exchange']}")
-        print(f"   Spread: {opp['spread_percentage']:.2f}% | Ganancia: {opp['profit_per_unit']:.2f} {fiat}")
+        print(f"{color}{icon} [{time_str}] {opp.coin}/{fiat}")
+        print(f"   {opp.buy_exchange} → {opp.sell_exchange}")
+        print(f"   Spread: {opp.spread_percentage:.2f}% | Ganancia: {opp.profit_per_unit:.2f} {fiat}")
         print()
 
 def main():
@@ -158,6 +163,7 @@ Ejemplos de uso:
   python arbitrage_analytics.py --fiat ARS --days 30   # Análisis de 30 días para ARS
   python arbitrage_analytics.py --exchanges-only       # Solo recomendaciones de exchanges
   python arbitrage_analytics.py --recent               # Solo oportunidades recientes
+  python arbitrage_analytics.py --recent --min-spread 1  # Recientes con spread >= 1%
         """
     )
     
@@ -206,11 +212,19 @@ Ejemplos de uso:
         help='Mostrar solo oportunidades recientes'
     )
     
+    parser.add_argument(
+        '--min-spread',
+        type=float,
+        default=0.0,
+        help='Spread mínimo para oportunidades recientes (default: 0.0, sin filtro; '
+             'con 1 o más usa el índice de spread alto)'
+    )
+    
     args = parser.parse_args()
     
     # Abrir base de datos
     try:
-        db = ArbitrageDatabase(args.db_path)
+        db = ArbitrageDatabase(db_path=args.db_path, readonly=True)
     except Exception as e:
         print(f"{Fore.RED}❌ Error al abrir base de datos: {e}")
         print(f"{Fore.YELLOW}💡 Asegúrate de ejecutar el monitor con --save-db primero")
@@ -235,12 +249,13 @@ Ejemplos de uso:
     elif args.coins_only:
         display_coin_statistics(db, args.fiat, args.days)
     elif args.recent:
-        display_recent_opportunities(db, args.fiat, 24)
+        display_recent_opportunities(db, args.fiat, 24, args.min_spread)
     else:
-        # Mostrar todo
-        display_exchange_recommendations(db, args.fiat, args.days)
-        display_best_pairs(db, args.fiat, args.days)
-        display_coin_statistics(db, args.fiat, args.days)
+        # Mostrar todo (las tres consultas en un solo viaje a la BD)
+        bundle = db.get_analytics_bundle(args.fiat, args.days, limit=10)
+        display_exchange_recommendations(db, args.fiat, args.days, stats=bundle.exchanges)
+        display_best_pairs(db, args.fiat, args.days, pairs=bundle.pairs)
+        display_coin_statistics(db, args.fiat, args.days, coins=bundle.coins)
     
     db.close()
 
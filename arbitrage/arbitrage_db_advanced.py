@@ -5,21 +5,36 @@ Esquema detallado optimizado para análisis profesional
 """
 
 import os
-import json
+import time
+import struct
 import hashlib
-from datetime import datetime, timedelta
+import weakref
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
 try:
-    import psycopg2
-    from psycopg2.extras import RealDictCursor, execute_batch
+    from psycopg2.extras import execute_values
+    from psycopg2.pool import ThreadedConnectionPool
     POSTGRES_AVAILABLE = True
 except ImportError:
     POSTGRES_AVAILABLE = False
 
 import sqlite3
 
+# Campos de cada cotización que se guardan en exchange_quotes (en orden)
+QUOTE_FIELDS = ('ask', 'bid', 'totalAsk', 'totalBid', 'time')
+
+# Los mismos campos empaquetados para el hash del snapshot (None -> NaN)
+QUOTE_HASH_STRUCT = struct.Struct(f'<{len(QUOTE_FIELDS)}d')
+NAN = float('nan')
+
+# Caché de análisis: segundos de vigencia y máximo de entradas
+ANALYTICS_CACHE_TTL = 30
+ANALYTICS_CACHE_SIZE = 128
+
 @dataclass
 class MarketSnapshot:
     """Snapshot completo del mercado en un momento dado"""
@@ -43,6 +58,26 @@ class ExchangeQuote:
     total_bid: Optional[float]  # Precio CON comisiones
     api_timestamp: Optional[int]
 
+# Registros livianos (tuplas con nombre) para los resultados de análisis
+ExchangePerformance = namedtuple('ExchangePerformance', [
+    'exchange', 'times_buy', 'times_sell', 'total_appearances',
+    'avg_spread', 'max_spread', 'total_potential_profit'
+])
+HourlyProfit = namedtuple('HourlyProfit', [
+    'hour', 'num_opportunities', 'avg_spread', 'max_spread', 'avg_profit', 'total_potential_profit'
+])
+DailyProfit = namedtuple('DailyProfit', [
+    'day_of_week', 'num_opportunities', 'avg_spread', 'max_spread', 'total_potential_profit'
+])
+PairPerformance = namedtuple('PairPerformance', [
+    'buy_exchange', 'sell_exchange', 'coin', 'frequency',
+    'avg_spread', 'max_spread', 'avg_profit', 'total_potential_profit'
+])
+TopSpread = namedtuple('TopSpread', [
+    'buy_exchange', 'sell_exchange', 'coin', 'fiat', 'spread_percentage', 'profit_per_unit', 'created_at'
+])
+ProAnalysisBundle = namedtuple('ProAnalysisBundle', ['exchanges', 'hourly', 'daily', 'pairs'])
+
 class ArbitrageDatabaseAdvanced:
     """Base de datos avanzada para análisis profesional de arbitraje"""
     
@@ -50,95 +85,317 @@ class ArbitrageDatabaseAdvanced:
         self.db_url = db_url or os.getenv('DATABASE_URL')
         self.db_path = db_path
         self.conn = None
+        self.pool = None
         self.is_postgres = False
+        # Sentencias preparadas (PREPARE) por conexión de PostgreSQL
+        self._prepared = weakref.WeakKeyDictionary()
+        # (consulta, parámetros) -> (versión de los datos, registros)
+        self._analytics_cache = {}
         
         if self.db_url and POSTGRES_AVAILABLE:
             self._init_postgres()
         else:
             self._init_sqlite()
+        
+        self._build_queries()
+    
+    def _build_queries(self):
+        """
+        Arma una sola vez el SQL de los análisis con el estilo del backend
+        
+        En PostgreSQL el texto usa $1, $2... y se prepara en el servidor
+        (PREPARE); en SQLite el texto fijo aprovecha la caché de sentencias
+        del módulo sqlite3.
+        """
+        if self.is_postgres:
+            p = [f"${i}" for i in range(1, 4)]
+            hour_extract = "EXTRACT(HOUR FROM ms.timestamp)::int"
+            dow_extract = "EXTRACT(DOW FROM ms.timestamp)::int"
+            spread, profit = "ao.spread_pct_f8", "ao.profit_f8"
+        else:
+            p = ['?'] * 3
+            hour_extract = "CAST(strftime('%H', ms.timestamp) AS INTEGER)"
+            dow_extract = "CAST(strftime('%w', ms.timestamp) AS INTEGER)"
+            spread, profit = "ao.spread_percentage", "ao.profit_per_unit"
+        
+        self._hour_extract = hour_extract
+        self._spread_col, self._profit_col = spread, profit
+        
+        # La ventana se calcula en la BD (hora local, como se guardan los
+        # snapshots); el segundo parámetro es el número de días
+        if self.is_postgres:
+            window = f"ms.fiat = {p[0]} AND ms.timestamp >= LOCALTIMESTAMP - make_interval(days => {p[1]})"
+        else:
+            window = f"ms.fiat = {p[0]} AND ms.timestamp >= datetime('now', 'localtime', {p[1]})"
+        
+        # Tipo de registro de cada consulta (mismo orden de columnas que el SELECT)
+        self._row_types = {
+            'exchange_perf': ExchangePerformance,
+            'hourly_profit': HourlyProfit,
+            'daily_profit': DailyProfit,
+            'pair_perf': PairPerformance,
+            'top_spreads': TopSpread,
+        }
+        
+        self._queries = {
+            # Un solo recorrido del join: cada oportunidad se cuenta una vez por
+            # lado (compra/venta) cruzándola con la tabla constante de roles;
+            # los agregados salen ya como float (columnas float8 en PostgreSQL)
+            'exchange_perf': f"""
+                SELECT 
+                    CASE WHEN r.is_buy = 1 THEN ao.buy_exchange ELSE ao.sell_exchange END as exchange,
+                    SUM(r.is_buy) as times_buy,
+                    SUM(1 - r.is_buy) as times_sell,
+                    COUNT(*) as total_appearances,
+                    AVG({spread}) as avg_spread,
+                    MAX({spread}) as max_spread,
+                    SUM({profit}) as total_potential_profit
+                FROM arbitrage_opportunities ao
+                JOIN market_snapshots ms ON ao.snapshot_id = ms.id
+                CROSS JOIN (SELECT 1 as is_buy UNION ALL SELECT 0) r
+                WHERE {window}
+                GROUP BY 1
+                ORDER BY total_appearances DESC
+            """,
+            'hourly_profit': f"""
+                SELECT 
+                    {hour_extract} as hour,
+                    COUNT(*) as num_opportunities,
+                    AVG({spread}) as avg_spread,
+                    MAX({spread}) as max_spread,
+                    AVG({profit}) as avg_profit,
+                    SUM({profit}) as total_potential_profit
+                FROM arbitrage_opportunities ao
+                JOIN market_snapshots ms ON ao.snapshot_id = ms.id
+                WHERE {window}
+                GROUP BY {hour_extract}
+                ORDER BY hour
+            """,
+            'daily_profit': f"""
+                SELECT 
+                    {dow_extract} as day_of_week,
+                    COUNT(*) as num_opportunities,
+                    AVG({spread}) as avg_spread,
+                    MAX({spread}) as max_spread,
+                    SUM({profit}) as total_potential_profit
+                FROM arbitrage_opportunities ao
+                JOIN market_snapshots ms ON ao.snapshot_id = ms.id
+                WHERE {window}
+                GROUP BY {dow_extract}
+                ORDER BY day_of_week
+            """,
+            'pair_perf': f"""
+                SELECT 
+                    ao.buy_exchange,
+                    ao.sell_exchange,
+                    ms.coin,
+                    COUNT(*) as frequency,
+                    AVG({spread}) as avg_spread,
+                    MAX({spread}) as max_spread,
+                    AVG({profit}) as avg_profit,
+                    SUM({profit}) as total_potential_profit
+                FROM arbitrage_opportunities ao
+                JOIN market_snapshots ms ON ao.snapshot_id = ms.id
+                WHERE {window}
+                GROUP BY ao.buy_exchange, ao.sell_exchange, ms.coin
+                ORDER BY frequency DESC, avg_spread DESC
+                LIMIT {p[2]}
+            """,
+            # Filtro literal igual al del índice parcial idx_opps_high_spread:
+            # se recorre ya ordenado por spread y se corta en el LIMIT
+            'top_spreads': f"""
+                SELECT 
+                    ao.buy_exchange,
+                    ao.sell_exchange,
+                    ms.coin,
+                    ms.fiat,
+                    ao.spread_percentage,
+                    ao.profit_per_unit,
+                    ao.created_at
+                FROM arbitrage_opportunities ao
+                JOIN market_snapshots ms ON ao.snapshot_id = ms.id
+                WHERE ao.spread_percentage > 0.5
+                ORDER BY ao.spread_percentage DESC
+                LIMIT {p[0]}
+            """,
+        }
     
     def _init_postgres(self):
         """Inicializa PostgreSQL"""
         try:
-            self.conn = psycopg2.connect(self.db_url)
+            # Pool de conexiones: escrituras y análisis concurrentes no se
+            # serializan sobre una única conexión
+            self.pool = ThreadedConnectionPool(minconn=2, maxconn=15, dsn=self.db_url)
             self.is_postgres = True
             self._create_postgres_tables()
             print(f"✓ Conectado a PostgreSQL (Esquema Avanzado)")
         except Exception as e:
             print(f"⚠️  Error conectando a PostgreSQL: {e}")
+            if self.pool:
+                self.pool.closeall()
+                self.pool = None
+            self.is_postgres = False
             self._init_sqlite()
     
+    @contextmanager
+    def _cursor(self):
+        """
+        Entrega un cursor y confirma la transacción al salir del bloque
+        
+        En PostgreSQL toma una conexión del pool y la devuelve al terminar;
+        en SQLite usa la conexión única. Si hay error, hace rollback.
+        """
+        conn = self.pool.getconn() if self.is_postgres else self.conn
+        cursor = conn.cursor()
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            if self.is_postgres:
+                self.pool.putconn(conn)
+    
     def _init_sqlite(self):
         """Inicializa SQLite"""
         self.conn = sqlite3.connect(self.db_path)
-        self.conn.row_factory = sqlite3.Row
         self.is_postgres = False
+        
+        # WAL + synchronous=NORMAL: un solo fsync por transacción de snapshot
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        
         self._create_sqlite_tables()
         print(f"✓ Usando SQLite (Esquema Avanzado)")
     
     def _create_postgres_tables(self):
         """Crea tablas en PostgreSQL"""
-        cursor = self.conn.cursor()
-        
-        # Tabla 1: Market Snapshots
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS market_snapshots (
-                id SERIAL PRIMARY KEY,
-                timestamp TIMESTAMP NOT NULL,
-                coin VARCHAR(20) NOT NULL,
-                fiat VARCHAR(10) NOT NULL,
-                volume DECIMAL(20, 8) NOT NULL,
-                snapshot_hash VARCHAR(64) UNIQUE,
-                num_exchanges INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Tabla 2: Exchange Quotes
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS exchange_quotes (
-                id SERIAL PRIMARY KEY,
-                snapshot_id INTEGER REFERENCES market_snapshots(id) ON DELETE CASCADE,
-                exchange VARCHAR(100) NOT NULL,
-                ask DECIMAL(20, 8),
-                bid DECIMAL(20, 8),
-                total_ask DECIMAL(20, 8),
-                total_bid DECIMAL(20, 8),
-                api_timestamp BIGINT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Tabla 3: Arbitrage Opportunities
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS arbitrage_opportunities (
-                id SERIAL PRIMARY KEY,
-                snapshot_id INTEGER REFERENCES market_snapshots(id) ON DELETE CASCADE,
-                buy_exchange VARCHAR(100) NOT NULL,
-                sell_exchange VARCHAR(100) NOT NULL,
-                buy_price DECIMAL(20, 8) NOT NULL,
-                sell_price DECIMAL(20, 8) NOT NULL,
-                spread_percentage DECIMAL(10, 4) NOT NULL,
-                profit_per_unit DECIMAL(20, 8) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Índices optimizados
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON market_snapshots(timestamp)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_coin_fiat ON market_snapshots(coin, fiat)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_quotes_snapshot ON exchange_quotes(snapshot_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_quotes_exchange ON exchange_quotes(exchange)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_opps_snapshot ON arbitrage_opportunities(snapshot_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_opps_exchanges ON arbitrage_opportunities(buy_exchange, sell_exchange)")
-        
-        self.conn.commit()
+        with self._cursor() as cursor:
+            # Tabla 1: Market Snapshots
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS market_snapshots (
+                    id SERIAL PRIMARY KEY,
+                    timestamp TIMESTAMP NOT NULL,
+                    coin VARCHAR(20) NOT NULL,
+                    fiat VARCHAR(10) NOT NULL,
+                    volume DECIMAL(20, 8) NOT NULL,
+                    snapshot_hash VARCHAR(64) UNIQUE,
+                    num_exchanges INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Tabla 2: Exchange Quotes
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS exchange_quotes (
+                    id SERIAL PRIMARY KEY,
+                    snapshot_id INTEGER REFERENCES market_snapshots(id) ON DELETE CASCADE,
+                    exchange VARCHAR(100) NOT NULL,
+                    ask DECIMAL(20, 8),
+                    bid DECIMAL(20, 8),
+                    total_ask DECIMAL(20, 8),
+                    total_bid DECIMAL(20, 8),
+                    api_timestamp BIGINT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Tabla 3: Arbitrage Opportunities
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS arbitrage_opportunities (
+                    id SERIAL PRIMARY KEY,
+                    snapshot_id INTEGER REFERENCES market_snapshots(id) ON DELETE CASCADE,
+                    buy_exchange VARCHAR(100) NOT NULL,
+                    sell_exchange VARCHAR(100) NOT NULL,
+                    buy_price DECIMAL(20, 8) NOT NULL,
+                    sell_price DECIMAL(20, 8) NOT NULL,
+                    spread_percentage DECIMAL(10, 4) NOT NULL,
+                    profit_per_unit DECIMAL(20, 8) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Copias en double precision para los análisis: DECIMAL se mantiene
+            # como valor de registro, pero AVG/SUM sobre float8 usan la FPU
+            cursor.execute("""
+                ALTER TABLE arbitrage_opportunities
+                ADD COLUMN IF NOT EXISTS spread_pct_f8 DOUBLE PRECISION
+                GENERATED ALWAYS AS (spread_percentage::double precision) STORED
+            """)
+            cursor.execute("""
+                ALTER TABLE arbitrage_opportunities
+                ADD COLUMN IF NOT EXISTS profit_f8 DOUBLE PRECISION
+                GENERATED ALWAYS AS (profit_per_unit::double precision) STORED
+            """)
+            
+            # Tramo de spread precalculado (décimas de %) para histogramas.
+            # INTEGER: spread_percentage admite hasta 999999.9999 y con
+            # SMALLINT un spread >= 3276.8% hacía fallar el INSERT; la versión
+            # SMALLINT anterior se elimina (junto con su índice) y se recrea
+            cursor.execute("""
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema()
+                  AND table_name = 'arbitrage_opportunities'
+                  AND column_name = 'spread_bucket' AND data_type = 'smallint'
+            """)
+            if cursor.fetchone():
+                cursor.execute("ALTER TABLE arbitrage_opportunities DROP COLUMN spread_bucket")
+            cursor.execute("""
+                ALTER TABLE arbitrage_opportunities
+                ADD COLUMN IF NOT EXISTS spread_bucket INTEGER
+                GENERATED ALWAYS AS (floor(spread_percentage * 10)::int) STORED
+            """)
+            
+            # Índices optimizados
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON market_snapshots(timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_coin_fiat ON market_snapshots(coin, fiat)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_quotes_snapshot ON exchange_quotes(snapshot_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_quotes_exchange ON exchange_quotes(exchange)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_opps_snapshot ON arbitrage_opportunities(snapshot_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_opps_exchanges ON arbitrage_opportunities(buy_exchange, sell_exchange)")
+            
+            # Índices alineados con los análisis (fiat = ? AND timestamp >= ?, GROUP BY por exchange)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_fiat_timestamp ON market_snapshots(fiat, timestamp)")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_opps_snapshot_cover ON arbitrage_opportunities(snapshot_id)
+                INCLUDE (buy_exchange, sell_exchange, spread_pct_f8, profit_f8)
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_opps_buy ON arbitrage_opportunities(buy_exchange)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_opps_sell ON arbitrage_opportunities(sell_exchange)")
+            
+            # Últimas oportunidades (ORDER BY created_at DESC LIMIT n) sin ordenar la tabla
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_opps_created_desc ON arbitrage_opportunities(created_at DESC)")
+            
+            # Índice parcial para los spreads más altos (get_top_spreads); el
+            # mismo que crea init_database.py
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_opps_high_spread
+                ON arbitrage_opportunities(spread_percentage DESC)
+                WHERE spread_percentage > 0.5
+            """)
+            
+            # BRIN: las filas llegan en orden de created_at, así que un índice
+            # por rangos de bloques es diminuto frente a un B-tree
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_opps_bucket
+                ON arbitrage_opportunities USING BRIN (spread_bucket, created_at)
+            """)
     
     def _create_sqlite_tables(self):
-        """Crea tablas en SQLite"""
-        cursor = self.conn.cursor()
+        """
+        Crea tablas en SQLite
         
-        cursor.execute("""
+        Todo el DDL va en un solo script (executescript) dentro de una única
+        transacción, en lugar de una llamada por sentencia.
+        """
+        self.conn.executescript("""
+            PRAGMA foreign_keys=ON;
+            BEGIN;
+            
             CREATE TABLE IF NOT EXISTS market_snapshots (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp DATETIME NOT NULL,
@@ -148,10 +405,8 @@ class ArbitrageDatabaseAdvanced:
                 snapshot_hash TEXT UNIQUE,
                 num_exchanges INTEGER,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
+            );
+            
             CREATE TABLE IF NOT EXISTS exchange_quotes (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 snapshot_id INTEGER REFERENCES market_snapshots(id) ON DELETE CASCADE,
@@ -162,10 +417,8 @@ class ArbitrageDatabaseAdvanced:
                 total_bid REAL,
                 api_timestamp INTEGER,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
+            );
+            
             CREATE TABLE IF NOT EXISTS arbitrage_opportunities (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 snapshot_id INTEGER REFERENCES market_snapshots(id) ON DELETE CASCADE,
@@ -176,17 +429,83 @@ class ArbitrageDatabaseAdvanced:
                 spread_percentage REAL NOT NULL,
                 profit_per_unit REAL NOT NULL,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
+            );
+            
+            CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON market_snapshots(timestamp);
+            CREATE INDEX IF NOT EXISTS idx_snapshots_coin_fiat ON market_snapshots(coin, fiat);
+            CREATE INDEX IF NOT EXISTS idx_quotes_snapshot ON exchange_quotes(snapshot_id);
+            CREATE INDEX IF NOT EXISTS idx_quotes_exchange ON exchange_quotes(exchange);
+            CREATE INDEX IF NOT EXISTS idx_opps_snapshot ON arbitrage_opportunities(snapshot_id);
+            CREATE INDEX IF NOT EXISTS idx_opps_exchanges ON arbitrage_opportunities(buy_exchange, sell_exchange);
+            CREATE INDEX IF NOT EXISTS idx_snapshots_fiat_timestamp ON market_snapshots(fiat, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_opps_buy ON arbitrage_opportunities(buy_exchange);
+            CREATE INDEX IF NOT EXISTS idx_opps_sell ON arbitrage_opportunities(sell_exchange);
+            CREATE INDEX IF NOT EXISTS idx_opps_created_desc ON arbitrage_opportunities(created_at DESC);
+            
+            -- Índice parcial para los spreads más altos (get_top_spreads)
+            CREATE INDEX IF NOT EXISTS idx_opps_high_spread
+                ON arbitrage_opportunities(spread_percentage DESC)
+                WHERE spread_percentage > 0.5;
+            
+            -- Índice parcial solo con las oportunidades rentables (spread > 0)
+            CREATE INDEX IF NOT EXISTS idx_opps_profitable
+                ON arbitrage_opportunities(snapshot_id, spread_percentage)
+                WHERE spread_percentage > 0;
+            
+            COMMIT;
         """)
+    
+    @staticmethod
+    def _snapshot_hash(timestamp: datetime, coin: str, fiat: str, quote_rows: List[Tuple]) -> str:
+        """
+        Hash único del snapshot, calculado en streaming sobre los precios
+        empaquetados en binario (sin serializar quotes_data a JSON)
         
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON market_snapshots(timestamp)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_coin_fiat ON market_snapshots(coin, fiat)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_quotes_snapshot ON exchange_quotes(snapshot_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_quotes_exchange ON exchange_quotes(exchange)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_opps_snapshot ON arbitrage_opportunities(snapshot_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_opps_exchanges ON arbitrage_opportunities(buy_exchange, sell_exchange)")
+        quote_rows son las filas (exchange, ask, bid, totalAsk, totalBid, time)
+        ya extraídas y ordenadas por exchange que se guardan en exchange_quotes.
+        """
+        h = hashlib.blake2b(digest_size=32)
+        h.update(f"{timestamp.isoformat()}_{coin}_{fiat}".encode())
         
-        self.conn.commit()
+        for exchange, *values in quote_rows:
+            h.update(b"_" + exchange.encode())
+            h.update(QUOTE_HASH_STRUCT.pack(*(
+                NAN if value is None else float(value) for value in values
+            )))
+        
+        return h.hexdigest()
+    
+    def _snapshot_id_by_hash(self, cursor, snapshot_hash: str) -> int:
+        """ID de un snapshot ya guardado (duplicado), usando el índice UNIQUE del hash"""
+        param = '%s' if self.is_postgres else '?'
+        cursor.execute(f"SELECT id FROM market_snapshots WHERE snapshot_hash = {param}", (snapshot_hash,))
+        return cursor.fetchone()[0]
+    
+    def _snapshot_rows(self, coin: str, fiat: str, volume: float, quotes_data: Dict, opportunities: List) -> Tuple:
+        """
+        Filas a guardar para un snapshot: (snapshot, cotizaciones, oportunidades)
+        
+        Las filas hijas no llevan snapshot_id; se agrega al insertarlas.
+        """
+        timestamp = datetime.now()
+        
+        # Una sola pasada sobre quotes_data (validación incluida): las mismas
+        # filas sirven para el hash y para exchange_quotes
+        quote_rows = [
+            (exchange, *map(data.get, QUOTE_FIELDS))
+            for exchange, data in sorted(quotes_data.items())
+            if isinstance(data, dict)
+        ]
+        snapshot_hash = self._snapshot_hash(timestamp, coin, fiat, quote_rows)
+        
+        opp_rows = [
+            (opp.buy_exchange, opp.sell_exchange, opp.buy_price,
+             opp.sell_price, opp.spread_percentage, opp.profit_per_unit)
+            for opp in opportunities
+        ]
+        snapshot_row = (timestamp, coin, fiat, volume, snapshot_hash, len(quotes_data))
+        
+        return snapshot_row, quote_rows, opp_rows
     
     def save_market_snapshot(self, coin: str, fiat: str, volume: float, quotes_data: Dict, opportunities: List) -> int:
         """
@@ -200,260 +519,335 @@ class ArbitrageDatabaseAdvanced:
             opportunities: Lista de oportunidades detectadas
             
         Returns:
-            ID del snapshot creado
+            ID del snapshot creado (o del existente si el hash ya estaba guardado)
         """
-        timestamp = datetime.now()
-        
-        # Crear hash único del snapshot
-        snapshot_str = f"{timestamp.isoformat()}_{coin}_{fiat}_{json.dumps(quotes_data, sort_keys=True)}"
-        snapshot_hash = hashlib.sha256(snapshot_str.encode()).hexdigest()
-        
-        cursor = self.conn.cursor()
-        param = '%s' if self.is_postgres else '?'
-        
-        # Guardar snapshot
-        if self.is_postgres:
-            cursor.execute(f"""
-                INSERT INTO market_snapshots (timestamp, coin, fiat, volume, snapshot_hash, num_exchanges)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """, (timestamp, coin, fiat, volume, snapshot_hash, len(quotes_data)))
-            snapshot_id = cursor.fetchone()[0]
-        else:
-            cursor.execute(f"""
-                INSERT INTO market_snapshots (timestamp, coin, fiat, volume, snapshot_hash, num_exchanges)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (timestamp, coin, fiat, volume, snapshot_hash, len(quotes_data)))
-            snapshot_id = cursor.lastrowid
-        
-        # Guardar cotizaciones de cada exchange
-        for exchange, data in quotes_data.items():
-            if isinstance(data, dict):
-                ask = data.get('ask')
-                bid = data.get('bid')
-                total_ask = data.get('totalAsk')
-                total_bid = data.get('totalBid')
-                api_timestamp = data.get('time')
-                
-                if self.is_postgres:
-                    cursor.execute("""
-                        INSERT INTO exchange_quotes 
-                        (snapshot_id, exchange, ask, bid, total_ask, total_bid, api_timestamp)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """, (snapshot_id, exchange, ask, bid, total_ask, total_bid, api_timestamp))
-                else:
-                    cursor.execute("""
-                        INSERT INTO exchange_quotes 
-                        (snapshot_id, exchange, ask, bid, total_ask, total_bid, api_timestamp)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (snapshot_id, exchange, ask, bid, total_ask, total_bid, api_timestamp))
+        snapshot_row, quote_rows, opp_rows = self._snapshot_rows(coin, fiat, volume, quotes_data, opportunities)
+        snapshot_hash = snapshot_row[4]
         
-        # Guardar oportunidades
-        for opp in opportunities:
+        # Todo el snapshot en una sola transacción (commit/rollback al salir)
+        with self._cursor() as cursor:
             if self.is_postgres:
+                # Snapshot, cotizaciones y oportunidades en un solo viaje: los
+                # hijos se pasan como arrays por columna y se expanden con unnest.
+                # Si el hash ya existe, s queda vacío y no se inserta ningún hijo
+                quote_cols = [list(col) for col in zip(*quote_rows)] or [[]] * 6
+                opp_cols = [list(col) for col in zip(*opp_rows)] or [[]] * 6
                 cursor.execute("""
-                    INSERT INTO arbitrage_opportunities
-                    (snapshot_id, buy_exchange, sell_exchange, buy_price, sell_price, 
-                     spread_percentage, profit_per_unit)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (snapshot_id, opp.buy_exchange, opp.sell_exchange, opp.buy_price,
-                      opp.sell_price, opp.spread_percentage, opp.profit_per_unit))
+                    WITH s AS (
+                        INSERT INTO market_snapshots (timestamp, coin, fiat, volume, snapshot_hash, num_exchanges)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                        ON CONFLICT (snapshot_hash) DO NOTHING
+                        RETURNING id
+                    ), q AS (
+                        INSERT INTO exchange_quotes 
+                        (snapshot_id, exchange, ask, bid, total_ask, total_bid, api_timestamp)
+                        SELECT s.id, t.*
+                        FROM s, unnest(%s::text[], %s::numeric[], %s::numeric[],
+                                       %s::numeric[], %s::numeric[], %s::bigint[]) AS t
+                    ), o AS (
+                        INSERT INTO arbitrage_opportunities
+                        (snapshot_id, buy_exchange, sell_exchange, buy_price, sell_price, 
+                         spread_percentage, profit_per_unit)
+                        SELECT s.id, t.*
+                        FROM s, unnest(%s::text[], %s::text[], %s::numeric[],
+                                       %s::numeric[], %s::numeric[], %s::numeric[]) AS t
+                    )
+                    SELECT id FROM s
+                """, (*snapshot_row, *quote_cols, *opp_cols))
+                result = cursor.fetchone()
+                if result is None:
+                    return self._snapshot_id_by_hash(cursor, snapshot_hash)
+                snapshot_id = result[0]
             else:
                 cursor.execute("""
+                    INSERT INTO market_snapshots (timestamp, coin, fiat, volume, snapshot_hash, num_exchanges)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (snapshot_hash) DO NOTHING
+                """, snapshot_row)
+                if cursor.rowcount == 0:
+                    return self._snapshot_id_by_hash(cursor, snapshot_hash)
+                snapshot_id = cursor.lastrowid
+                
+                # Cotizaciones y oportunidades se insertan en lote (un viaje por tabla)
+                cursor.executemany("""
+                    INSERT INTO exchange_quotes 
+                    (snapshot_id, exchange, ask, bid, total_ask, total_bid, api_timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [(snapshot_id, *row) for row in quote_rows])
+                cursor.executemany("""
                     INSERT INTO arbitrage_opportunities
                     (snapshot_id, buy_exchange, sell_exchange, buy_price, sell_price, 
                      spread_percentage, profit_per_unit)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (snapshot_id, opp.buy_exchange, opp.sell_exchange, opp.buy_price,
-                      opp.sell_price, opp.spread_percentage, opp.profit_per_unit))
+                """, [(snapshot_id, *row) for row in opp_rows])
         
-        self.conn.commit()
         return snapshot_id
     
-    def get_exchange_performance(self, fiat: str = "PEN", days: int = 7) -> List[Dict]:
+    def save_market_snapshots_many(self, batch: List[Tuple[str, str, float, Dict, List]]) -> List[int]:
         """
-        Análisis de rendimiento de exchanges
-        Responde: ¿En qué exchanges debo tener fondos?
-        """
-        cursor = self.conn.cursor()
-        since_date = datetime.now() - timedelta(days=days)
-        param = '%s' if self.is_postgres else '?'
+        Guarda varios snapshots en una sola transacción
         
-        query = f"""
-            SELECT 
-                ao.buy_exchange as exchange,
-                'buy' as role,
-                COUNT(*) as times_appeared,
-                AVG(ao.spread_percentage) as avg_spread,
-                MAX(ao.spread_percentage) as max_spread,
-                AVG(ao.profit_per_unit) as avg_profit,
-                SUM(ao.profit_per_unit) as total_potential_profit
-            FROM arbitrage_opportunities ao
-            JOIN market_snapshots ms ON ao.snapshot_id = ms.id
-            WHERE ms.fiat = {param} AND ms.timestamp >= {param}
-            GROUP BY ao.buy_exchange
-            
-            UNION ALL
+        Pensado para un proceso que acumula snapshots y los guarda juntos:
+        un solo commit para todo el lote y, en PostgreSQL, un INSERT
+        multi-fila por tabla (execute_values) en lugar de uno por snapshot.
+        
+        Args:
+            batch: Lista de (coin, fiat, volume, quotes_data, opportunities)
             
-            SELECT 
-                ao.sell_exchange as exchange,
-                'sell' as role,
-                COUNT(*) as times_appeared,
-                AVG(ao.spread_percentage) as avg_spread,
-                MAX(ao.spread_percentage) as max_spread,
-                AVG(ao.profit_per_unit) as avg_profit,
-                SUM(ao.profit_per_unit) as total_potential_profit
-            FROM arbitrage_opportunities ao
-            JOIN market_snapshots ms ON ao.snapshot_id = ms.id
-            WHERE ms.fiat = {param} AND ms.timestamp >= {param}
-            GROUP BY ao.sell_exchange
-        """
-        
-        results = cursor.execute(query, (fiat, since_date, fiat, since_date)).fetchall()
-        
-        # Agrupar por exchange
-        exchange_stats = {}
-        for row in results:
-            exchange = row[0] if self.is_postgres else row['exchange']
-            role = row[1] if self.is_postgres else row['role']
+        Returns:
+            IDs de los snapshots en el mismo orden del lote (el existente si
+            el hash ya estaba guardado)
+        """
+        prepared = [self._snapshot_rows(*item) for item in batch]
+        if not prepared:
+            return []
+        
+        with self._cursor() as cursor:
+            snapshot_rows = [snapshot_row for snapshot_row, _, _ in prepared]
             
-            if exchange not in exchange_stats:
-                exchange_stats[exchange] = {
-                    'exchange': exchange,
-                    'times_buy': 0,
-                    'times_sell': 0,
-                    'total_appearances': 0,
-                    'avg_spread': 0,
-                    'max_spread': 0,
-                    'total_potential_profit': 0
-                }
+            # hash -> id de los snapshots realmente insertados en este lote
+            if self.is_postgres:
+                inserted = dict(execute_values(cursor, """
+                    INSERT INTO market_snapshots (timestamp, coin, fiat, volume, snapshot_hash, num_exchanges)
+                    VALUES %s
+                    ON CONFLICT (snapshot_hash) DO NOTHING
+                    RETURNING snapshot_hash, id
+                """, snapshot_rows, page_size=500, fetch=True))
+            else:
+                inserted = {}
+                for snapshot_row in snapshot_rows:
+                    cursor.execute("""
+                        INSERT INTO market_snapshots (timestamp, coin, fiat, volume, snapshot_hash, num_exchanges)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (snapshot_hash) DO NOTHING
+                    """, snapshot_row)
+                    if cursor.rowcount:
+                        inserted[snapshot_row[4]] = cursor.lastrowid
             
-            times = row[2] if self.is_postgres else row['times_appeared']
-            avg_spread = float(row[3]) if self.is_postgres else row['avg_spread']
-            max_spread = float(row[4]) if self.is_postgres else row['max_spread']
-            total_profit = float(row[6]) if self.is_postgres else row['total_potential_profit']
+            # Hijos de todos los snapshots nuevos (una vez por hash)
+            pending = dict(inserted)
+            snapshot_ids, quote_rows, opp_rows = [], [], []
+            for snapshot_row, quotes, opps in prepared:
+                snapshot_hash = snapshot_row[4]
+                if snapshot_hash in pending:
+                    snapshot_id = pending.pop(snapshot_hash)
+                    quote_rows.extend((snapshot_id, *row) for row in quotes)
+                    opp_rows.extend((snapshot_id, *row) for row in opps)
+                elif snapshot_hash in inserted:
+                    snapshot_id = inserted[snapshot_hash]
+                else:
+                    snapshot_id = self._snapshot_id_by_hash(cursor, snapshot_hash)
+                snapshot_ids.append(snapshot_id)
             
-            if role == 'buy':
-                exchange_stats[exchange]['times_buy'] = times
+            quotes_sql = """
+                INSERT INTO exchange_quotes 
+                (snapshot_id, exchange, ask, bid, total_ask, total_bid, api_timestamp)
+                VALUES {}
+            """
+            opps_sql = """
+                INSERT INTO arbitrage_opportunities
+                (snapshot_id, buy_exchange, sell_exchange, buy_price, sell_price, 
+                 spread_percentage, profit_per_unit)
+                VALUES {}
+            """
+            if self.is_postgres:
+                execute_values(cursor, quotes_sql.format('%s'), quote_rows, page_size=500)
+                execute_values(cursor, opps_sql.format('%s'), opp_rows, page_size=500)
             else:
-                exchange_stats[exchange]['times_sell'] = times
-            
-            exchange_stats[exchange]['total_appearances'] += times
-            exchange_stats[exchange]['avg_spread'] = max(exchange_stats[exchange]['avg_spread'], avg_spread)
-            exchange_stats[exchange]['max_spread'] = max(exchange_stats[exchange]['max_spread'], max_spread)
-            exchange_stats[exchange]['total_potential_profit'] += total_profit
+                cursor.executemany(quotes_sql.format('(?, ?, ?, ?, ?, ?, ?)'), quote_rows)
+                cursor.executemany(opps_sql.format('(?, ?, ?, ?, ?, ?, ?)'), opp_rows)
+        
+        return snapshot_ids
+    
+    def _prepare(self, cursor, name: str, statement: str):
+        """
+        Prepara una sentencia en el servidor una sola vez por conexión
+        
+        psycopg2 no usa sentencias preparadas por sí mismo; con PREPARE /
+        EXECUTE las llamadas repetidas se saltan el parseo y la planificación.
+        """
+        prepared = self._prepared.setdefault(cursor.connection, set())
+        if name not in prepared:
+            cursor.execute(f"PREPARE {name} AS {statement}")
+            prepared.add(name)
+    
+    def _data_version(self, cursor) -> int:
+        """Último id de snapshot: cambia con cada snapshot nuevo (lectura por PK)"""
+        cursor.execute("SELECT MAX(id) FROM market_snapshots")
+        return cursor.fetchone()[0] or 0
+    
+    def _run_query(self, name: str, params: Tuple) -> List[Tuple]:
+        """
+        Ejecuta una consulta de análisis y devuelve las filas como tuplas con nombre
         
-        result_list = list(exchange_stats.values())
-        result_list.sort(key=lambda x: x['total_appearances'], reverse=True)
+        El resultado se reutiliza mientras no lleguen snapshots nuevos y no
+        cambie el tramo de ANALYTICS_CACHE_TTL segundos (la ventana de
+        tiempo de la consulta avanza aunque no haya datos nuevos).
+        """
+        return self._run_queries([(name, params)])[0]
+    
+    def _run_queries(self, queries: List[Tuple[str, Tuple]]) -> List[List[Tuple]]:
+        """
+        Ejecuta varias consultas de análisis sobre una misma conexión y transacción
+        
+        La versión de los datos se lee una sola vez para todo el grupo, así
+        los resultados son coherentes entre sí (ver _run_query para la caché).
+        """
+        results = []
+        
+        with self._cursor() as cursor:
+            version = (self._data_version(cursor), int(time.time() // ANALYTICS_CACHE_TTL))
+            
+            for name, params in queries:
+                key = (name, params)
+                
+                cached = self._analytics_cache.get(key)
+                if cached and cached[0] == version:
+                    results.append(list(cached[1]))
+                    continue
+                
+                if self.is_postgres:
+                    self._prepare(cursor, name, self._queries[name])
+                    cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+                else:
+                    cursor.execute(self._queries[name], params)
+                
+                rows = list(map(self._row_types[name]._make, cursor.fetchall()))
+                
+                if key not in self._analytics_cache and len(self._analytics_cache) >= ANALYTICS_CACHE_SIZE:
+                    self._analytics_cache.pop(next(iter(self._analytics_cache)))
+                self._analytics_cache[key] = (version, rows)
+                
+                results.append(list(rows))
         
-        return result_list
+        return results
+    
+    def _days_param(self, days: int):
+        """Parámetro de la ventana: días en PostgreSQL, modificador en SQLite"""
+        return days if self.is_postgres else f'-{days} days'
+    
+    def get_exchange_performance(self, fiat: str = "PEN", days: int = 7) -> List[ExchangePerformance]:
+        """
+        Análisis de rendimiento de exchanges
+        Responde: ¿En qué exchanges debo tener fondos?
+        """
+        return self._run_query('exchange_perf', (fiat, self._days_param(days)))
     
-    def get_hourly_profitability(self, fiat: str = "PEN", days: int = 7) -> List[Dict]:
+    def get_hourly_profitability(self, fiat: str = "PEN", days: int = 7) -> List[HourlyProfit]:
         """
         Análisis de rentabilidad por hora
         Responde: ¿A qué horas debo estar activo?
         """
-        cursor = self.conn.cursor()
-        since_date = datetime.now() - timedelta(days=days)
-        param = '%s' if self.is_postgres else '?'
+        return self._run_query('hourly_profit', (fiat, self._days_param(days)))
+    
+    def get_hourly_profitability_batch(self, params: List[Tuple[str, int]]) -> Dict[Tuple[str, int], List[HourlyProfit]]:
+        """
+        Rentabilidad por hora para varias combinaciones (fiat, días) a la vez
+        
+        Las combinaciones viajan como una tabla VALUES y se cruzan con los
+        snapshots en una sola consulta, en lugar de una consulta por par.
+        
+        Returns:
+            Dict {(fiat, días): filas como las de get_hourly_profitability}
+        """
+        params = list(dict.fromkeys(params))
+        results = {key: [] for key in params}
+        if not params:
+            return results
         
         if self.is_postgres:
-            hour_extract = "EXTRACT(HOUR FROM ms.timestamp)"
+            values = ', '.join(['(%s, %s)'] * len(params))
+            since = "LOCALTIMESTAMP - make_interval(days => p.days)"
         else:
-            hour_extract = "CAST(strftime('%H', ms.timestamp) AS INTEGER)"
+            values = ', '.join(['(?, ?)'] * len(params))
+            since = "datetime('now', 'localtime', '-' || p.days || ' days')"
         
         query = f"""
+            WITH params(fiat, days) AS (VALUES {values})
             SELECT 
-                {hour_extract} as hour,
+                p.fiat,
+                p.days,
+                {self._hour_extract} as hour,
                 COUNT(*) as num_opportunities,
-                AVG(ao.spread_percentage) as avg_spread,
-                MAX(ao.spread_percentage) as max_spread,
-                AVG(ao.profit_per_unit) as avg_profit,
-                SUM(ao.profit_per_unit) as total_potential_profit
-            FROM arbitrage_opportunities ao
-            JOIN market_snapshots ms ON ao.snapshot_id = ms.id
-            WHERE ms.fiat = {param} AND ms.timestamp >= {param}
-            GROUP BY {hour_extract}
-            ORDER BY hour
-        """
-        
-        results = cursor.execute(query, (fiat, since_date)).fetchall()
-        return [dict(row) for row in results]
+                AVG({self._spread_col}) as avg_spread,
+                MAX({self._spread_col}) as max_spread,
+                AVG({self._profit_col}) as avg_profit,
+                SUM({self._profit_col}) as total_potential_profit
+            FROM params p
+            JOIN market_snapshots ms ON ms.fiat = p.fiat AND ms.timestamp >= {since}
+            JOIN arbitrage_opportunities ao ON ao.snapshot_id = ms.id
+            GROUP BY p.fiat, p.days, {self._hour_extract}
+            ORDER BY p.fiat, p.days, hour
+        """
+        
+        with self._cursor() as cursor:
+            cursor.execute(query, [value for key in params for value in key])
+            
+            for fiat, days, *row in cursor.fetchall():
+                results[(fiat, days)].append(HourlyProfit._make(row))
+        
+        return results
     
-    def get_daily_profitability(self, fiat: str = "PEN", days: int = 30) -> List[Dict]:
+    def get_daily_profitability(self, fiat: str = "PEN", days: int = 30) -> List[DailyProfit]:
         """
         Análisis de rentabilidad por día de semana
         Responde: ¿Qué días son mejores?
         """
-        cursor = self.conn.cursor()
-        since_date = datetime.now() - timedelta(days=days)
-        param = '%s' if self.is_postgres else '?'
-        
-        if self.is_postgres:
-            dow_extract = "EXTRACT(DOW FROM ms.timestamp)"
-        else:
-            dow_extract = "CAST(strftime('%w', ms.timestamp) AS INTEGER)"
-        
-        query = f"""
-            SELECT 
-                {dow_extract} as day_of_week,
-                COUNT(*) as num_opportunities,
-                AVG(ao.spread_percentage) as avg_spread,
-                MAX(ao.spread_percentage) as max_spread,
-                SUM(ao.profit_per_unit) as total_potential_profit
-            FROM arbitrage_opportunities ao
-            JOIN market_snapshots ms ON ao.snapshot_id = ms.id
-            WHERE ms.fiat = {param} AND ms.timestamp >= {param}
-            GROUP BY {dow_extract}
-            ORDER BY day_of_week
-        """
-        
-        results = cursor.execute(query, (fiat, since_date)).fetchall()
-        return [dict(row) for row in results]
+        return self._run_query('daily_profit', (fiat, self._days_param(days)))
     
-    def get_exchange_pair_performance(self, fiat: str = "PEN", days: int = 7, limit: int = 20) -> List[Dict]:
+    def get_exchange_pair_performance(self, fiat: str = "PEN", days: int = 7, limit: int = 20) -> List[PairPerformance]:
         """
         Mejores pares de exchanges
         Responde: ¿Entre qué exchanges arbitrar?
         """
-        cursor = self.conn.cursor()
-        since_date = datetime.now() - timedelta(days=days)
-        param = '%s' if self.is_postgres else '?'
+        return self._run_query('pair_perf', (fiat, self._days_param(days), limit))
+    
+    def get_top_spreads(self, limit: int = 10) -> List[TopSpread]:
+        """
+        Oportunidades con mayor spread (solo spread > 0.5%)
+        Responde: ¿Cuáles fueron las mejores oportunidades registradas?
+        """
+        return self._run_query('top_spreads', (limit,))
+    
+    def get_analysis_bundle(self, fiat: str = "PEN", days: int = 7, daily_days: int = 30,
+                            limit: int = 10) -> ProAnalysisBundle:
+        """
+        Obtiene exchanges, horas, días y pares en una sola transacción
         
-        query = f"""
-            SELECT 
-                ao.buy_exchange,
-                ao.sell_exchange,
-                ms.coin,
-                COUNT(*) as frequency,
-                AVG(ao.spread_percentage) as avg_spread,
-                MAX(ao.spread_percentage) as max_spread,
-                AVG(ao.profit_per_unit) as avg_profit,
-                SUM(ao.profit_per_unit) as total_potential_profit
-            FROM arbitrage_opportunities ao
-            JOIN market_snapshots ms ON ao.snapshot_id = ms.id
-            WHERE ms.fiat = {param} AND ms.timestamp >= {param}
-            GROUP BY ao.buy_exchange, ao.sell_exchange, ms.coin
-            ORDER BY frequency DESC, avg_spread DESC
-            LIMIT {param}
-        """
-        
-        results = cursor.execute(query, (fiat, since_date, limit)).fetchall()
-        return [dict(row) for row in results]
+        Las cuatro consultas comparten conexión del pool y versión de datos,
+        así el reporte completo cuesta un solo checkout y un solo MAX(id).
+        
+        Args:
+            days: Ventana para exchanges, horas y pares
+            daily_days: Ventana para el análisis por día de semana
+            limit: Máximo de pares a devolver
+        """
+        window = self._days_param(days)
+        
+        return ProAnalysisBundle._make(self._run_queries([
+            ('exchange_perf', (fiat, window)),
+            ('hourly_profit', (fiat, window)),
+            ('daily_profit', (fiat, self._days_param(daily_days))),
+            ('pair_perf', (fiat, window, limit)),
+        ]))
     
     def get_total_snapshots(self) -> int:
         """Total de snapshots guardados"""
-        cursor = self.conn.cursor()
-        result = cursor.execute("SELECT COUNT(*) as count FROM market_snapshots").fetchone()
-        return result[0] if self.is_postgres else result['count']
+        with self._cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM market_snapshots")
+            return cursor.fetchone()[0]
     
     def get_total_opportunities(self) -> int:
         """Total de oportunidades guardadas"""
-        cursor = self.conn.cursor()
-        result = cursor.execute("SELECT COUNT(*) as count FROM arbitrage_opportunities").fetchone()
-        return result[0] if self.is_postgres else result['count']
+        with self._cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM arbitrage_opportunities")
+            return cursor.fetchone()[0]
     
     def close(self):
+        """Cierra la conexión (o todas las conexiones del pool)"""
+        if self.pool:
+            self.pool.closeall()
+            self.pool = None
         if self.conn:
             self.conn.close()
     
@@ -5,13 +5,26 @@ Monitorea spreads y rutas de arbitraje en tiempo real
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import time
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from operator import attrgetter, itemgetter
 import json
 from colorama import init, Fore, Back, Style
-import os
+import sys
+
+# orjson parsea los payloads de la API bastante más rápido; si no está
+# instalado se usa el módulo json estándar (ambos aceptan bytes)
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 try:
     from arbitrage_db import ArbitrageDatabase
@@ -28,9 +41,16 @@ except ImportError:
 # Inicializar colorama para colores en terminal
 init(autoreset=True)
 
-@dataclass
+# Secuencia ANSI: borrar pantalla y llevar el cursor al inicio
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+
+@dataclass(frozen=True)
 class ArbitrageOpportunity:
     """Representa una oportunidad de arbitraje"""
+    # __slots__ explícito (compatible con Python < 3.10): sin __dict__ por instancia
+    __slots__ = ('coin', 'fiat', 'buy_exchange', 'sell_exchange', 'buy_price',
+                 'sell_price', 'spread_percentage', 'profit_per_unit', 'timestamp')
+    
     coin: str
     fiat: str
     buy_exchange: str
@@ -41,6 +61,9 @@ class ArbitrageOpportunity:
     profit_per_unit: float
     timestamp: datetime
 
+# Clave de orden implementada en C (attrgetter) en lugar de una lambda por elemento
+BY_SPREAD = attrgetter('spread_percentage')
+
 class CriptoYaArbitrageMonitor:
     """Monitor de arbitraje para CriptoYa API"""
     
@@ -61,7 +84,24 @@ class CriptoYaArbitrageMonitor:
     # Delay entre peticiones para evitar rate limiting (segundos)
     REQUEST_DELAY = 0.5
     
-    def __init__(self, min_spread: float = 0.5, update_interval: int = 30, request_delay: float = 0.5, save_to_db: bool = False, db_path: str = "arbitrage_opportunities.db", use_advanced_db: bool = False):
+    # Peticiones en vuelo a la vez: el delay separa el INICIO de cada petición,
+    # así que las respuestas lentas se solapan en lugar de sumarse
+    MAX_CONCURRENT_REQUESTS = 4
+    
+    # Plantillas de pantalla, construidas una sola vez
+    _SEP = f"{Fore.CYAN}{'─' * 80}"
+    # (color, icono) por nivel de spread: < 2%, >= 2%, >= 5%
+    _SPREAD_STYLES = ((Fore.WHITE, "💡"), (Fore.YELLOW, "⭐"), (Fore.GREEN, "🔥"))
+    _ROW_FMT = f"{Style.RESET_ALL}\n".join([
+        "{color}{icon} #{i} {coin}/{fiat}",
+        f"   Comprar en:  {Fore.CYAN}{{buy:<20}}{{color}} @ {{buy_price:,.2f}} {{fiat}} (con comisiones)",
+        f"   Vender en:   {Fore.MAGENTA}{{sell:<20}}{{color}} @ {{sell_price:,.2f}} {{fiat}} (con comisiones)",
+        f"   {Fore.GREEN}Spread: {{spread:.2f}}% | Ganancia neta: {{profit:,.2f}} {{fiat}}{Style.RESET_ALL}",
+        f"   {Fore.YELLOW}⚠️  Considera tiempo de transferencia entre exchanges{Style.RESET_ALL}",
+        "",
+    ])
+    
+    def __init__(self, min_spread: float = 0.5, update_interval: int = 30, request_delay: float = 0.5, save_to_db: bool = False, db_path: str = "arbitrage_opportunities.db", use_advanced_db: bool = False, max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS):
         """
         Inicializa el monitor de arbitraje
         
@@ -72,10 +112,12 @@ class CriptoYaArbitrageMonitor:
             save_to_db: Si True, guarda oportunidades en base de datos
             db_path: Ruta al archivo de base de datos
             use_advanced_db: Si True, usa esquema avanzado con snapshots completos
+            max_concurrent_requests: Peticiones simultáneas a la API (y conexiones keep-alive)
         """
         self.min_spread = min_spread
         self.update_interval = max(update_interval, 30)  # Mínimo 30 segundos
         self.request_delay = request_delay
+        self.max_concurrent_requests = max(max_concurrent_requests, 1)
         self.save_to_db = save_to_db
         self.use_advanced_db = use_advanced_db
         self.db = None
@@ -86,7 +128,7 @@ class CriptoYaArbitrageMonitor:
                 self.db_advanced = ArbitrageDatabaseAdvanced(db_path=db_path)
                 print(f"{Fore.GREEN}✓ Base de datos AVANZADA habilitada: {db_path}")
             elif DB_AVAILABLE:
-                self.db = ArbitrageDatabase(db_path)
+                self.db = ArbitrageDatabase(db_path=db_path)
                 print(f"{Fore.GREEN}✓ Base de datos habilitada: {db_path}")
             else:
                 print(f"{Fore.YELLOW}⚠️  Módulo de base de datos no disponible. Continuando sin guardar.")
@@ -96,6 +138,25 @@ class CriptoYaArbitrageMonitor:
         self.session.headers.update({
             'User-Agent': 'CriptoYa Arbitrage Monitor/1.0'
         })
+        # Todas las peticiones van al mismo host: un pool keep-alive del tamaño
+        # de la concurrencia evita abrir una conexión TCP/TLS nueva por par y
+        # que las conexiones sobrantes se descarten al devolverlas al pool
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrent_requests)
+        self.session.mount('https://', adapter)
+        
+        # URL de cada (coin, fiat, volume), construida la primera vez que se consulta
+        # (así sigue valiendo si COINS/FIATS se cambian después de __init__)
+        self._quote_urls: Dict[Tuple[str, str, float], str] = {}
+        # Último payload por URL (etag, digest, cotizaciones) para peticiones condicionales
+        self._quote_payloads: Dict[str, Tuple[Optional[str], bytes, Dict]] = {}
+        # Oportunidades calculadas por par: {(coin, fiat): (digest, oportunidades)}
+        self._spread_cache: Dict[Tuple[str, str], Tuple[bytes, List[ArbitrageOpportunity]]] = {}
+        # Peticiones en curso: llamadas simultáneas al mismo par esperan la misma respuesta
+        self._inflight: Dict[Tuple[str, str, float], Future] = {}
+        self._inflight_lock = threading.Lock()
+        # Líneas de configuración de la pantalla, recalculadas solo si cambian los parámetros
+        self._config_key = None
+        self._config_lines: List[str] = []
         
     def get_fees(self) -> Optional[Dict]:
         """
@@ -115,10 +176,10 @@ class CriptoYaArbitrageMonitor:
         try:
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            self.FEES_CACHE = response.json()
+            self.FEES_CACHE = json_loads(response.content)
             self.FEES_CACHE_TIME = time.time()
             return self.FEES_CACHE
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"{Fore.RED}Error al obtener comisiones: {e}")
             return None
     
@@ -134,13 +195,62 @@ class CriptoYaArbitrageMonitor:
         Returns:
             Diccionario con cotizaciones por exchange o None si hay error
         """
-        url = f"{self.BASE_URL}/{coin}/{fiat}/{volume}"
+        result = self.get_quotes_with_digest(coin, fiat, volume)
+        return result[1] if result else None
+    
+    def get_quotes_with_digest(self, coin: str, fiat: str, volume: float = 1.0) -> Optional[Tuple[bytes, Dict]]:
+        """
+        Obtiene cotizaciones junto con una huella del payload recibido
+        
+        Envía If-None-Match cuando el servidor dio un ETag; ante un 304 se
+        reutilizan las cotizaciones ya parseadas sin volver a leer el JSON.
+        
+        Las llamadas concurrentes para el mismo (coin, fiat, volume) comparten
+        una sola petición HTTP.
+        
+        Returns:
+            Tupla (digest, cotizaciones) o None si hay error
+        """
+        key = (coin, fiat, volume)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        
+        if not owner:
+            return future.result()
         
         try:
-            response = self.session.get(url, timeout=10)
+            future.set_result(self._fetch_quotes(coin, fiat, volume))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+        return future.result()
+    
+    def _fetch_quotes(self, coin: str, fiat: str, volume: float) -> Optional[Tuple[bytes, Dict]]:
+        """Descarga un par de la API (ver get_quotes_with_digest)"""
+        key = (coin, fiat, volume)
+        url = self._quote_urls.get(key)
+        if url is None:
+            url = self._quote_urls[key] = f"{self.BASE_URL}/{coin}/{fiat}/{volume}"
+        cached = self._quote_payloads.get(url)
+        headers = {'If-None-Match': cached[0]} if cached and cached[0] else None
+        
+        try:
+            response = self.session.get(url, timeout=10, headers=headers)
+            if response.status_code == 304 and cached:
+                return cached[1], cached[2]
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            digest = hashlib.blake2b(response.content, digest_size=16).digest()
+            if cached and cached[1] == digest:
+                return digest, cached[2]
+            data = json_loads(response.content)
+            self._quote_payloads[url] = (response.headers.get('ETag'), digest, data)
+            return digest, data
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"{Fore.RED}Error al obtener cotizaciones para {coin}/{fiat}: {e}")
             return None
     
@@ -159,56 +269,57 @@ class CriptoYaArbitrageMonitor:
         opportunities = []
         exchanges_data = []
         
-        # Extraer datos de cada exchange
+        # Extraer (exchange, ask, bid) de cada exchange
         for exchange, data in quotes.items():
             if isinstance(data, dict) and 'totalBid' in data and 'totalAsk' in data:
                 # totalBid: precio al que puedes vender (lo que te pagan)
                 # totalAsk: precio al que puedes comprar (lo que pagas)
                 if data['totalBid'] and data['totalAsk']:
-                    exchanges_data.append({
-                        'exchange': exchange,
-                        'bid': float(data['totalBid']),  # Precio de venta
-                        'ask': float(data['totalAsk']),  # Precio de compra
-                        'time': data.get('time', int(time.time()))
-                    })
-        
-        # Calcular spreads entre todos los pares de exchanges
-        for i, buy_exchange in enumerate(exchanges_data):
-            for sell_exchange in exchanges_data[i+1:]:
-                # Comprar en exchange con menor ask, vender en exchange con mayor bid
-                if buy_exchange['ask'] < sell_exchange['bid']:
-                    buy_price = buy_exchange['ask']
-                    sell_price = sell_exchange['bid']
-                    buy_name = buy_exchange['exchange']
-                    sell_name = sell_exchange['exchange']
-                elif sell_exchange['ask'] < buy_exchange['bid']:
-                    buy_price = sell_exchange['ask']
-                    sell_price = buy_exchange['bid']
-                    buy_name = sell_exchange['exchange']
-                    sell_name = buy_exchange['exchange']
-                else:
-                    continue
+                    exchanges_data.append((exchange, float(data['totalAsk']), float(data['totalBid'])))
+        
+        if not exchanges_data:
+            return opportunities
+        
+        # Variables locales en el bucle interno: evita buscar atributos en cada par
+        min_spread = self.min_spread
+        add = opportunities.append
+        Opportunity = ArbitrageOpportunity
+        
+        # Cota global: ningún par supera (max_bid - min_ask) / min_ask. Solo
+        # pueden participar los asks que alcanzan el umbral contra el mejor bid
+        # y los bids que lo alcanzan contra el mejor ask
+        min_ask = min(ask for _, ask, _ in exchanges_data)
+        max_bid = max(bid for _, _, bid in exchanges_data)
+        if max_bid <= min_ask or ((max_bid - min_ask) / min_ask) * 100 < min_spread:
+            return opportunities
+        
+        sellers = [e for e in exchanges_data if ((e[2] - min_ask) / min_ask) * 100 >= min_spread]
+        buyers = [e for e in exchanges_data if ((max_bid - e[1]) / e[1]) * 100 >= min_spread]
+        
+        # Candidatos de compra ordenados por ask: para cada exchange de venta el
+        # spread solo decrece al avanzar, así que se corta en el primer par que
+        # no supera el umbral en lugar de recorrer los E² pares
+        by_ask = sorted(buyers, key=itemgetter(1))
+        now = datetime.now()
+        
+        for sell_name, _, sell_price in sellers:
+            for buy_name, buy_price, _ in by_ask:
+                if buy_price >= sell_price:
+                    break
                 
                 # Calcular spread y ganancia
                 spread = ((sell_price - buy_price) / buy_price) * 100
-                profit = sell_price - buy_price
+                if spread < min_spread:
+                    break
+                if buy_name == sell_name:
+                    continue
                 
-                if spread >= self.min_spread:
-                    opportunity = ArbitrageOpportunity(
-                        coin=coin,
-                        fiat=fiat,
-                        buy_exchange=buy_name,
-                        sell_exchange=sell_name,
-                        buy_price=buy_price,
-                        sell_price=sell_price,
-                        spread_percentage=spread,
-                        profit_per_unit=profit,
-                        timestamp=datetime.now()
-                    )
-                    opportunities.append(opportunity)
+                # Argumentos posicionales en el orden de los campos del dataclass
+                add(Opportunity(coin, fiat, buy_name, sell_name, buy_price, sell_price,
+                                spread, sell_price - buy_price, now))
         
         # Ordenar por spread descendente
-        opportunities.sort(key=lambda x: x.spread_percentage, reverse=True)
+        opportunities.sort(key=BY_SPREAD, reverse=True)
         return opportunities
     
     def display_opportunities(self, opportunities: List[ArbitrageOpportunity], top_n: int = 10):
@@ -219,51 +330,86 @@ class CriptoYaArbitrageMonitor:
             opportunities: Lista de oportunidades
             top_n: Número de oportunidades a mostrar
         """
-        # Limpiar pantalla
-        os.system('cls' if os.name == 'nt' else 'clear')
+        # Toda la pantalla se arma en memoria y se emite con una sola escritura;
+        # la primera línea limpia la terminal con ANSI (colorama lo traduce en
+        # Windows) en lugar de lanzar un proceso 'clear'/'cls' en cada refresco
+        config_key = (self.min_spread, self.update_interval, self.request_delay)
+        if config_key != self._config_key:
+            self._config_key = config_key
+            self._config_lines = [
+                f"{Fore.CYAN}Umbral mínimo de spread: {self.min_spread}%",
+                f"{Fore.CYAN}Intervalo de actualización: {self.update_interval}s",
+                f"{Fore.CYAN}Delay entre peticiones: {self.request_delay}s",
+                f"{Fore.GREEN}✓ Los precios YA INCLUYEN todas las comisiones (trading + transferencia)\n",
+            ]
         
-        # Encabezado
-        print(f"\n{Back.BLUE}{Fore.WHITE} 📊 MONITOR DE ARBITRAJE CRIPTOYA {Style.RESET_ALL}")
-        print(f"{Fore.CYAN}Actualizado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"{Fore.CYAN}Umbral mínimo de spread: {self.min_spread}%")
-        print(f"{Fore.CYAN}Intervalo de actualización: {self.update_interval}s")
-        print(f"{Fore.CYAN}Delay entre peticiones: {self.request_delay}s")
-        print(f"{Fore.GREEN}✓ Los precios YA INCLUYEN todas las comisiones (trading + transferencia)\n")
+        lines = [
+            CLEAR_SCREEN,
+            f"{Back.BLUE}{Fore.WHITE} 📊 MONITOR DE ARBITRAJE CRIPTOYA {Style.RESET_ALL}",
+            f"{Fore.CYAN}Actualizado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            *self._config_lines,
+        ]
         
         if not opportunities:
-            print(f"{Fore.YELLOW}⚠️  No se encontraron oportunidades de arbitraje con spread >= {self.min_spread}%")
+            lines.append(f"{Fore.YELLOW}⚠️  No se encontraron oportunidades de arbitraje con spread >= {self.min_spread}%")
+            self._write_lines(lines)
             return
         
         # Mostrar top oportunidades
-        print(f"{Back.GREEN}{Fore.BLACK} 🚀 TOP {min(top_n, len(opportunities))} OPORTUNIDADES DE ARBITRAJE {Style.RESET_ALL}\n")
+        lines.append(f"{Back.GREEN}{Fore.BLACK} 🚀 TOP {min(top_n, len(opportunities))} OPORTUNIDADES DE ARBITRAJE {Style.RESET_ALL}\n")
         
+        row_fmt = self._ROW_FMT
+        styles = self._SPREAD_STYLES
         for i, opp in enumerate(opportunities[:top_n], 1):
             # Color según el spread
-            if opp.spread_percentage >= 5:
-                color = Fore.GREEN
-                icon = "🔥"
-            elif opp.spread_percentage >= 2:
-                color = Fore.YELLOW
-                icon = "⭐"
-            else:
-                color = Fore.WHITE
-                icon = "💡"
+            spread = opp.spread_percentage
+            color, icon = styles[(spread >= 2) + (spread >= 5)]
             
-            print(f"{color}{icon} #{i} {opp.coin}/{opp.fiat}")
-            print(f"   Comprar en:  {Fore.CYAN}{opp.buy_exchange:<20}{color} @ {opp.buy_price:,.2f} {opp.fiat} (con comisiones)")
-            print(f"   Vender en:   {Fore.MAGENTA}{opp.sell_exchange:<20}{color} @ {opp.sell_price:,.2f} {opp.fiat} (con comisiones)")
-            print(f"   {Fore.GREEN}Spread: {opp.spread_percentage:.2f}% | Ganancia neta: {opp.profit_per_unit:,.2f} {opp.fiat}{Style.RESET_ALL}")
-            print(f"   {Fore.YELLOW}⚠️  Considera tiempo de transferencia entre exchanges{Style.RESET_ALL}")
-            print()
+            lines.append(row_fmt.format(
+                color=color, icon=icon, i=i, coin=opp.coin, fiat=opp.fiat,
+                buy=opp.buy_exchange, buy_price=opp.buy_price,
+                sell=opp.sell_exchange, sell_price=opp.sell_price,
+                spread=spread, profit=opp.profit_per_unit
+            ))
         
         # Resumen
         total_opportunities = len(opportunities)
-        avg_spread = sum(o.spread_percentage for o in opportunities) / total_opportunities
+        avg_spread = sum(map(BY_SPREAD, opportunities)) / total_opportunities
         max_spread = opportunities[0].spread_percentage if opportunities else 0
         
-        print(f"{Fore.CYAN}{'─' * 80}")
-        print(f"📈 Resumen: {total_opportunities} oportunidades | Spread promedio: {avg_spread:.2f}% | Spread máximo: {max_spread:.2f}%")
-        print(f"{Fore.CYAN}{'─' * 80}\n")
+        lines.append(self._SEP)
+        lines.append(f"📈 Resumen: {total_opportunities} oportunidades | Spread promedio: {avg_spread:.2f}% | Spread máximo: {max_spread:.2f}%")
+        lines.append(f"{self._SEP}\n")
+        self._write_lines(lines)
+    
+    @staticmethod
+    def _write_lines(lines: List[str]):
+        """Escribe las líneas en stdout con una sola llamada (reset de color por línea, como print)"""
+        sys.stdout.write(''.join(f"{line}{Style.RESET_ALL}\n" for line in lines))
+        sys.stdout.flush()
+    
+    def get_quotes_batch(self, pairs: List[Tuple[str, str, float]]) -> Dict[Tuple[str, str], Optional[Tuple[bytes, Dict]]]:
+        """
+        Descarga las cotizaciones de varios pares en un solo ciclo
+        
+        La API no ofrece un endpoint de consultas múltiples, así que las
+        peticiones se lanzan en un pool de hilos sobre las conexiones keep-alive
+        de la sesión, espaciadas por request_delay para respetar el rate limiting.
+        
+        Args:
+            pairs: Lista de (coin, fiat, volume) a consultar
+            
+        Returns:
+            Diccionario {(coin, fiat): (digest, cotizaciones)} en el orden de pairs
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            futures = {}
+            for i, (coin, fiat, volume) in enumerate(pairs):
+                if i:
+                    time.sleep(self.request_delay)
+                futures[(coin, fiat)] = executor.submit(self.get_quotes_with_digest, coin, fiat, volume)
+            
+            return {key: future.result() for key, future in futures.items()}
     
     def scan_all_markets(self) -> List[ArbitrageOpportunity]:
         """
@@ -273,33 +419,40 @@ class CriptoYaArbitrageMonitor:
             Lista de todas las oportunidades encontradas
         """
         all_opportunities = []
+        snapshots = []
+        # Pares únicos: una moneda repetida en --coins/--fiats no debe generar
+        # peticiones ni oportunidades duplicadas (calculate_spreads ya produce
+        # a lo sumo una oportunidad por (compra, venta) dentro de cada par)
+        pairs = list(dict.fromkeys(
+            (coin, fiat, self.VOLUME) for coin in self.COINS for fiat in self.FIATS
+        ))
+        quotes_map = self.get_quotes_batch(pairs)
         
-        for coin in self.COINS:
-            for fiat in self.FIATS:
-                quotes = self.get_quotes(coin, fiat, self.VOLUME)
+        for (coin, fiat), result in quotes_map.items():
+            if result:
+                digest, quotes = result
+                cached = self._spread_cache.get((coin, fiat))
                 
-                if quotes:
+                if cached and cached[0] == digest:
+                    # Payload idéntico al ciclo anterior: mismas oportunidades, hora nueva
+                    now = datetime.now()
+                    opportunities = [replace(opp, timestamp=now) for opp in cached[1]]
+                else:
                     opportunities = self.calculate_spreads(quotes, coin, fiat)
-                    all_opportunities.extend(opportunities)
-                    
-                    # Guardar snapshot completo si usa BD avanzada
-                    if self.save_to_db and self.db_advanced:
-                        try:
-                            self.db_advanced.save_market_snapshot(
-                                coin=coin,
-                                fiat=fiat,
-                                volume=self.VOLUME,
-                                quotes_data=quotes,
-                                opportunities=opportunities
-                            )
-                        except Exception as e:
-                            print(f"{Fore.YELLOW}⚠️  Error guardando snapshot: {e}")
-                
-                # Pausa entre peticiones para respetar rate limiting
-                time.sleep(self.request_delay)
+                self._spread_cache[(coin, fiat)] = (digest, opportunities)
+                all_opportunities.extend(opportunities)
+                snapshots.append((coin, fiat, self.VOLUME, quotes, opportunities))
+        
+        # Guardar snapshots completos si usa BD avanzada (una transacción por ciclo)
+        if self.save_to_db and self.db_advanced and snapshots:
+            try:
+                self.db_advanced.save_market_snapshots_many(snapshots)
+            except Exception as e:
+                print(f"{Fore.YELLOW}⚠️  Error guardando snapshots: {e}")
         
-        # Ordenar todas las oportunidades por spread
-        all_opportunities.sort(key=lambda x: x.spread_percentage, reverse=True)
+        # Ordenar todas las oportunidades por spread: cada par ya llega ordenado,
+        # así que timsort solo fusiona esas rachas
+        all_opportunities.sort(key=BY_SPREAD, reverse=True)
         
         # Guardar en base de datos básica si no es avanzada
         if self.save_to_db and self.db and not self.db_advanced and all_opportunities:
@@ -381,6 +534,13 @@ Ejemplos de uso:
         help='Delay entre peticiones a la API en segundos (default: 0.5)'
     )
     
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=CriptoYaArbitrageMonitor.MAX_CONCURRENT_REQUESTS,
+        help=f'Peticiones simultáneas a la API (default: {CriptoYaArbitrageMonitor.MAX_CONCURRENT_REQUESTS})'
+    )
+    
     parser.add_argument(
         '--coins', '-c',
         nargs='+',
@@ -421,7 +581,8 @@ Ejemplos de uso:
         request_delay=args.delay,
         save_to_db=args.save_db,
         db_path=args.db_path,
-        use_advanced_db=args.use_advanced_db
+        use_advanced_db=args.use_advanced_db,
+        max_concurrent_requests=args.concurrency
     )
     
     # Configurar monedas personalizadas si se especificaron
@@ -6,12 +6,13 @@ Herramienta completa para decidir dónde distribuir fondos y cuándo operar
 
 import argparse
 from datetime import datetime
+from typing import List, Optional
 from colorama import init, Fore, Style
 from arbitrage_db_advanced import ArbitrageDatabaseAdvanced
 
 init(autoreset=True)
 
-def display_exchange_recommendations(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", days: int = 7):
+def display_exchange_recommendations(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", days: int = 7, stats: Optional[List] = None):
     """Recomendaciones de exchanges para distribuir fondos"""
     
     print(f"\n{Fore.CYAN}{'='*90}")
@@ -19,7 +20,8 @@ def display_exchange_recommendations(db: ArbitrageDatabaseAdvanced, fiat: str =
     print(f"{Fore.CYAN}Análisis de los últimos {days} días")
     print(f"{Fore.CYAN}{'='*90}\n")
     
-    stats = db.get_exchange_performance(fiat, days)
+    if stats is None:
+        stats = db.get_exchange_performance(fiat, days)
     
     if not stats:
         print(f"{Fore.YELLOW}⚠️  No hay datos suficientes. Ejecuta el monitor con --save-db --use-advanced-db\n")
@@ -36,19 +38,19 @@ def display_exchange_recommendations(db: ArbitrageDatabaseAdvanced, fiat: str =
             color = Fore.WHITE
             icon = "  "
         
-        print(f"{color}{icon} {stat['exchange']:<28} "
-              f"{stat['times_buy']:<10} "
-              f"{stat['times_sell']:<10} "
-              f"{stat['total_appearances']:<10} "
-              f"{stat['total_potential_profit']:,.2f} {fiat}")
+        print(f"{color}{icon} {stat.exchange:<28} "
+              f"{stat.times_buy:<10} "
+              f"{stat.times_sell:<10} "
+              f"{stat.total_appearances:<10} "
+              f"{stat.total_potential_profit:,.2f} {fiat}")
     
     print(f"\n{Fore.GREEN}💡 RECOMENDACIÓN DE DISTRIBUCIÓN:")
     top_3 = stats[:3]
-    total_appearances = sum(s['total_appearances'] for s in top_3)
+    total_appearances = sum(s.total_appearances for s in top_3)
     
     for i, stat in enumerate(top_3, 1):
-        percentage = (stat['total_appearances'] / total_appearances * 100) if total_appearances > 0 else 0
-        print(f"{Fore.WHITE}  {i}. {Fore.CYAN}{stat['exchange']:<30} {Fore.WHITE}→ {Fore.GREEN}{percentage:.1f}% de tus fondos")
+        percentage = (stat.total_appearances / total_appearances * 100) if total_appearances > 0 else 0
+        print(f"{Fore.WHITE}  {i}. {Fore.CYAN}{stat.exchange:<30} {Fore.WHITE}→ {Fore.GREEN}{percentage:.1f}% de tus fondos")
     
     print(f"\n{Fore.YELLOW}📊 INTERPRETACIÓN:")
     print(f"{Fore.WHITE}  • Compras: Veces que apareció como mejor precio de COMPRA")
@@ -56,7 +58,7 @@ def display_exchange_recommendations(db: ArbitrageDatabaseAdvanced, fiat: str =
     print(f"{Fore.WHITE}  • Total: Total de oportunidades donde este exchange fue útil")
     print()
 
-def display_hourly_analysis(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", days: int = 7):
+def display_hourly_analysis(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", days: int = 7, hourly: Optional[List] = None):
     """Análisis de mejores horas para operar"""
     
     print(f"\n{Fore.CYAN}{'='*90}")
@@ -64,28 +66,29 @@ def display_hourly_analysis(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", da
     print(f"{Fore.CYAN}Últimos {days} días")
     print(f"{Fore.CYAN}{'='*90}\n")
     
-    hourly = db.get_hourly_profitability(fiat, days)
+    if hourly is None:
+        hourly = db.get_hourly_profitability(fiat, days)
     
     if not hourly:
         print(f"{Fore.YELLOW}⚠️  No hay datos suficientes\n")
         return
     
     # Encontrar mejor hora
-    best_hour = max(hourly, key=lambda x: x['num_opportunities'])
+    best_hour = max(hourly, key=lambda x: x.num_opportunities)
     
     print(f"{Fore.WHITE}{'Hora':<10} {'Oportunidades':<15} {'Spread Prom':<15} {'Ganancia Total':<20}")
     print(f"{Fore.CYAN}{'-'*70}")
     
     for hour_data in hourly:
-        hour = int(hour_data['hour'])
-        num_opps = hour_data['num_opportunities']
-        avg_spread = hour_data['avg_spread']
-        total_profit = hour_data['total_potential_profit']
+        hour = hour_data.hour
+        num_opps = hour_data.num_opportunities
+        avg_spread = hour_data.avg_spread
+        total_profit = hour_data.total_potential_profit
         
-        if num_opps >= best_hour['num_opportunities'] * 0.7:
+        if num_opps >= best_hour.num_opportunities * 0.7:
             color = Fore.GREEN
             icon = "🔥"
-        elif num_opps >= best_hour['num_opportunities'] * 0.4:
+        elif num_opps >= best_hour.num_opportunities * 0.4:
             color = Fore.YELLOW
             icon = "⭐"
         else:
@@ -95,14 +98,14 @@ def display_hourly_analysis(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", da
         print(f"{color}{icon} {hour:02d}:00{' '*4} {num_opps:<15} {avg_spread:.2f}%{' '*9} {total_profit:,.2f} {fiat}")
     
     print(f"\n{Fore.GREEN}💡 RECOMENDACIÓN:")
-    top_hours = sorted(hourly, key=lambda x: x['num_opportunities'], reverse=True)[:3]
+    top_hours = sorted(hourly, key=lambda x: x.num_opportunities, reverse=True)[:3]
     print(f"{Fore.WHITE}  Estar MUY ACTIVO en estas horas:")
     for hour_data in top_hours:
-        hour = int(hour_data['hour'])
-        print(f"{Fore.CYAN}    • {hour:02d}:00 - {(hour+1):02d}:00 {Fore.WHITE}({hour_data['num_opportunities']} oportunidades)")
+        hour = hour_data.hour
+        print(f"{Fore.CYAN}    • {hour:02d}:00 - {(hour+1):02d}:00 {Fore.WHITE}({hour_data.num_opportunities} oportunidades)")
     print()
 
-def display_daily_analysis(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", days: int = 30):
+def display_daily_analysis(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", days: int = 30, daily: Optional[List] = None):
     """Análisis de mejores días para operar"""
     
     print(f"\n{Fore.CYAN}{'='*90}")
@@ -110,7 +113,8 @@ def display_daily_analysis(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", day
     print(f"{Fore.CYAN}Últimos {days} días")
     print(f"{Fore.CYAN}{'='*90}\n")
     
-    daily = db.get_daily_profitability(fiat, days)
+    if daily is None:
+        daily = db.get_daily_profitability(fiat, days)
     
     if not daily:
         print(f"{Fore.YELLOW}⚠️  No hay datos suficientes\n")
@@ -118,22 +122,22 @@ def display_daily_analysis(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", day
     
     days_names = ["Domingo", "Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
     
-    best_day = max(daily, key=lambda x: x['num_opportunities'])
+    best_day = max(daily, key=lambda x: x.num_opportunities)
     
     print(f"{Fore.WHITE}{'Día':<15} {'Oportunidades':<15} {'Spread Prom':<15} {'Ganancia Total':<20}")
     print(f"{Fore.CYAN}{'-'*70}")
     
     for day_data in daily:
-        day_num = int(day_data['day_of_week'])
+        day_num = day_data.day_of_week
         day_name = days_names[day_num]
-        num_opps = day_data['num_opportunities']
-        avg_spread = day_data['avg_spread']
-        total_profit = day_data['total_potential_profit']
+        num_opps = day_data.num_opportunities
+        avg_spread = day_data.avg_spread
+        total_profit = day_data.total_potential_profit
         
-        if day_num == int(best_day['day_of_week']):
+        if day_num == best_day.day_of_week:
             color = Fore.GREEN
             icon = "🏆"
-        elif num_opps >= best_day['num_opportunities'] * 0.7:
+        elif num_opps >= best_day.num_opportunities * 0.7:
             color = Fore.YELLOW
             icon = "⭐"
         else:
@@ -143,11 +147,11 @@ def display_daily_analysis(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", day
         print(f"{color}{icon} {day_name:<13} {num_opps:<15} {avg_spread:.2f}%{' '*9} {total_profit:,.2f} {fiat}")
     
     print(f"\n{Fore.GREEN}💡 RECOMENDACIÓN:")
-    best_day_name = days_names[int(best_day['day_of_week'])]
-    print(f"{Fore.WHITE}  El mejor día es: {Fore.CYAN}{best_day_name} {Fore.WHITE}({best_day['num_opportunities']} oportunidades)")
+    best_day_name = days_names[best_day.day_of_week]
+    print(f"{Fore.WHITE}  El mejor día es: {Fore.CYAN}{best_day_name} {Fore.WHITE}({best_day.num_opportunities} oportunidades)")
     print()
 
-def display_pair_recommendations(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", days: int = 7):
+def display_pair_recommendations(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN", days: int = 7, pairs: Optional[List] = None):
     """Mejores pares de exchanges para arbitrar"""
     
     print(f"\n{Fore.CYAN}{'='*90}")
@@ -155,7 +159,8 @@ def display_pair_recommendations(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN
     print(f"{Fore.CYAN}Últimos {days} días")
     print(f"{Fore.CYAN}{'='*90}\n")
     
-    pairs = db.get_exchange_pair_performance(fiat, days, limit=10)
+    if pairs is None:
+        pairs = db.get_exchange_pair_performance(fiat, days, limit=10)
     
     if not pairs:
         print(f"{Fore.YELLOW}⚠️  No hay datos suficientes\n")
@@ -169,12 +174,12 @@ def display_pair_recommendations(db: ArbitrageDatabaseAdvanced, fiat: str = "PEN
             color = Fore.WHITE
             icon = "💡"
         
-        print(f"{color}{icon} #{i} {pair['coin']}")
-        print(f"   {Fore.CYAN}Comprar en:  {pair['buy_exchange']:<30}")
-        print(f"   {Fore.MAGENTA}Vender en:   {pair['sell_exchange']:<30}")
-        print(f"   {Fore.WHITE}Frecuencia: {pair['frequency']} veces | "
-              f"Spread prom: {pair['avg_spread']:.2f}% | "
-              f"Ganancia total: {pair['total_potential_profit']:,.2f} {fiat}")
+        print(f"{color}{icon} #{i} {pair.coin}")
+        print(f"   {Fore.CYAN}Comprar en:  {pair.buy_exchange:<30}")
+        print(f"   {Fore.MAGENTA}Vender en:   {pair.sell_exchange:<30}")
+        print(f"   {Fore.WHITE}Frecuencia: {pair.frequency} veces | "
+              f"Spread prom: {pair.avg_spread:.2f}% | "
+              f"Ganancia total: {pair.total_potential_profit:,.2f} {fiat}")
         print()
 
 def main():
@@ -227,11 +232,13 @@ Ejemplos de uso:
     elif args.pairs_only:
         display_pair_recommendations(db, args.fiat, args.days)
     else:
-        # Análisis completo
-        display_exchange_recommendations(db, args.fiat, args.days)
-        display_hourly_analysis(db, args.fiat, args.days)
-        display_daily_analysis(db, args.fiat, min(args.days, 30))
-        display_pair_recommendations(db, args.fiat, args.days)
+        # Análisis completo (las cuatro consultas en un solo viaje a la BD)
+        daily_days = min(args.days, 30)
+        bundle = db.get_analysis_bundle(args.fiat, args.days, daily_days, limit=10)
+        display_exchange_recommendations(db, args.fiat, args.days, stats=bundle.exchanges)
+        display_hourly_analysis(db, args.fiat, args.days, hourly=bundle.hourly)
+        display_daily_analysis(db, args.fiat, daily_days, daily=bundle.daily)
+        display_pair_recommendations(db, args.fiat, args.days, pairs=bundle.pairs)
     
     db.close()
 
@@ -5,106 +5,234 @@ Identifica las mejores horas y días para arbitrar
 """
 
 import argparse
+import math
+import sys
 from datetime import datetime, timedelta
-from collections import defaultdict
+from typing import Dict, List, Optional
 from colorama import init, Fore, Style
 from arbitrage_db import ArbitrageDatabase
 
 # Inicializar colorama
 init(autoreset=True)
 
-def analyze_by_hour(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7):
+# Fin de línea con reset de color (lo que autoreset añade tras cada print)
+LINE_END = Style.RESET_ALL + "\n"
+
+# Celdas del mapa de calor por banda: 0 = sin datos, 1 = bajo ... 4 = muy alto
+HEATMAP_CELLS = tuple(
+    f"{color}{symbol}    "
+    for color, symbol in (
+        (Fore.LIGHTBLACK_EX, "·"),
+        (Fore.LIGHTBLACK_EX, "░"),
+        (Fore.WHITE, "▒"),
+        (Fore.YELLOW, "▓"),
+        (Fore.GREEN, "█")
+    )
+)
+
+# Plantillas de fila con el color y el ícono ya incluidos, una por nivel
+# (0 = mejor ... 2 = normal); en los bucles solo queda el formateo con %
+HOUR_ROW_TEMPLATES = tuple(
+    color + icon + " %-8s %-15d %.2f%%          %.2f%%"
+    for color, icon in ((Fore.GREEN, "🔥"), (Fore.YELLOW, "⭐"), (Fore.WHITE, "  "))
+)
+DAY_ROW_TEMPLATES = tuple(
+    color + icon + " %-13s %-15d %.2f%%          %.2f%%"
+    for color, icon in ((Fore.GREEN, "🏆"), (Fore.YELLOW, "⭐"), (Fore.WHITE, "  "))
+)
+RANGE_ROW_TEMPLATES = tuple(
+    color + icon + " %-23s %-15d %.2f%%"
+    for color, icon in ((Fore.GREEN, "🔥"), (Fore.YELLOW, "⭐"), (Fore.WHITE, "💡"))
+)
+EMPTY_HOUR_ROW = Fore.LIGHTBLACK_EX + "   %02d:00    0               -               -"
+EMPTY_DAY_ROW = Fore.LIGHTBLACK_EX + "   %-13s 0               -               -"
+
+# Rangos horarios de 6 horas (índice = hour_of_day / 6)
+TIME_RANGES = [
+    'Madrugada (00:00-05:59)',
+    'Mañana (06:00-11:59)',
+    'Tarde (12:00-17:59)',
+    'Noche (18:00-23:59)'
+]
+
+# Corte de la ventana sobre el resumen por hora: las horas completas salen
+# de opportunities_hourly y la hora del límite (parcial) se agrega desde
+# opportunities, así el resultado es exacto. Devuelve filas
+# (hour_of_day, day_of_week, n, sum_spread, max_spread)
+TIME_SLICE_QUERY = """
+    SELECT hour as hour_of_day, day_of_week, n, sum_spread, max_spread
+    FROM opportunities_hourly
+    WHERE fiat_id = (SELECT id FROM fiat WHERE name = ?) AND day >= ? AND (day > ? OR hour > ?)
+    UNION ALL
+    SELECT hour_of_day, day_of_week, COUNT(*), SUM(spread_percentage), MAX(spread_percentage)
+    FROM opportunities
+    WHERE fiat = ? AND timestamp >= ? AND timestamp < ?
+    GROUP BY hour_of_day, day_of_week
+"""
+
+# Agregaciones sobre el corte `s` (la de día de la semana, sobre `s_d`);
+# todas devuelven las columnas
+# kind, k1, k2, count, avg_spread, max_spread, best_count, best_spread.
+# Por hora: las 24 horas completas (serie 0-23 con LEFT JOIN); los máximos
+# para colorear (por hora y del mapa de calor) vienen como funciones de
+# ventana en cada fila
+TIME_BUCKET_QUERIES = {
+    'h': """
+        SELECT 
+            'h' as kind,
+            hours.hour as k1,
+            NULL as k2,
+            COALESCE(o.count, 0) as count,
+            o.avg_spread,
+            o.max_spread,
+            MAX(o.count) OVER () as best_count,
+            MAX(o.avg_spread) OVER () as best_spread
+        FROM hours
+        LEFT JOIN (
+            SELECT 
+                hour_of_day as hour,
+                SUM(n) as count,
+                SUM(sum_spread) / SUM(n) as avg_spread,
+                MAX(max_spread) as max_spread
+            FROM s
+            GROUP BY hour_of_day
+        ) o ON o.hour = hours.hour
+    """,
+    'd': """
+        SELECT 'd' as kind, day_of_week as k1, NULL as k2, SUM(n) as count,
+               SUM(sum_spread) / SUM(n) as avg_spread, MAX(max_spread) as max_spread,
+               NULL as best_count, NULL as best_spread
+        FROM s_d
+        GROUP BY day_of_week
+    """,
+    'r': """
+        SELECT 'r' as kind, hour_of_day / 6 as k1, NULL as k2, SUM(n) as count,
+               SUM(sum_spread) / SUM(n) as avg_spread, MAX(max_spread) as max_spread,
+               NULL as best_count, NULL as best_spread
+        FROM s
+        GROUP BY hour_of_day / 6
+    """,
+    'hd': """
+        SELECT 'hd' as kind, day_of_week as k1, hour_of_day as k2, SUM(n) as count,
+               NULL as avg_spread, NULL as max_spread,
+               MAX(SUM(n)) OVER () as best_count, NULL as best_spread
+        FROM s
+        GROUP BY day_of_week, hour_of_day
+    """
+}
+
+def _slice_params(fiat: str, since: datetime) -> list:
+    """Parámetros de TIME_SLICE_QUERY para la ventana que empieza en `since`"""
+    since_day = since.date()
+    hour_end = since.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return [fiat, since_day, since_day, since.hour, fiat, since, hour_end]
+
+def fetch_time_buckets(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7,
+                       day_days: Optional[int] = None, kinds=('h', 'd', 'r', 'hd')) -> Dict[str, list]:
+    """
+    Obtiene en una sola consulta las agregaciones pedidas en `kinds`
+    
+    Se leen del resumen opportunities_hourly (a lo sumo 24 filas por día),
+    así el costo no depende de cuántas oportunidades haya guardadas. El
+    corte de la ventana es el CTE `s` y cada agregación es una rama del
+    UNION ALL. `day_days` acota por separado la ventana por día de la
+    semana (CTE `s_d`), que nunca es mayor que `days`.
+    
+    Returns:
+        Diccionario kind -> filas, ordenadas por k1, k2
+    """
+    now = datetime.now()
+    ctes = ["s AS (" + TIME_SLICE_QUERY + ")"]
+    params = _slice_params(fiat, now - timedelta(days=days))
+    if 'd' in kinds:
+        ctes.append("s_d AS (" + TIME_SLICE_QUERY + ")")
+        params += _slice_params(fiat, now - timedelta(days=day_days or days))
+    
+    query = """
+        WITH RECURSIVE hours(hour) AS (
+            SELECT 0 UNION ALL SELECT hour + 1 FROM hours WHERE hour < 23
+        ),
+    """ + ",\n".join(ctes) + " UNION ALL ".join(TIME_BUCKET_QUERIES[kind] for kind in kinds) + """
+        ORDER BY kind, k1, k2
+    """
+    
+    buckets = {kind: [] for kind in kinds}
+    cursor = db.conn.cursor()
+    for row in cursor.execute(query, params):
+        buckets[row['kind']].append(row)
+    return buckets
+
+def _write_lines(lines: List[str]):
+    """Escribe el bloque de un análisis con una sola llamada a stdout"""
+    sys.stdout.write("".join(line + LINE_END for line in lines))
+
+def analyze_by_hour(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7, results: Optional[list] = None):
     """Analiza oportunidades por hora del día"""
     
-    print(f"\n{Fore.CYAN}{'='*80}")
-    print(f"{Fore.GREEN}⏰ ANÁLISIS POR HORA DEL DÍA - {fiat}")
-    print(f"{Fore.CYAN}Últimos {days} días")
-    print(f"{Fore.CYAN}{'='*80}\n")
+    lines = []
+    lines.append(f"\n{Fore.CYAN}{'='*80}")
+    lines.append(f"{Fore.GREEN}⏰ ANÁLISIS POR HORA DEL DÍA - {fiat}")
+    lines.append(f"{Fore.CYAN}Últimos {days} días")
+    lines.append(f"{Fore.CYAN}{'='*80}\n")
     
-    since_date = datetime.now() - timedelta(days=days)
-    
-    # Obtener todas las oportunidades
-    cursor = db.conn.cursor()
-    results = cursor.execute("""
-        SELECT 
-            strftime('%H', timestamp) as hour,
-            COUNT(*) as count,
-            AVG(spread_percentage) as avg_spread,
-            MAX(spread_percentage) as max_spread,
-            AVG(profit_per_unit) as avg_profit
-        FROM opportunities
-        WHERE fiat = ? AND timestamp >= ?
-        GROUP BY hour
-        ORDER BY hour
-    """, (fiat, since_date)).fetchall()
+    if results is None:
+        results = fetch_time_buckets(db, fiat, days, kinds=('h',))['h']
     
-    if not results:
-        print(f"{Fore.YELLOW}⚠️  No hay datos suficientes\n")
+    best_count = results[0]['best_count']
+    if best_count is None:
+        lines.append(f"{Fore.YELLOW}⚠️  No hay datos suficientes\n")
+        _write_lines(lines)
         return
     
-    # Convertir a diccionario
-    hourly_data = {int(row['hour']): dict(row) for row in results}
+    best_spread = results[0]['best_spread']
     
-    # Encontrar mejor hora
-    best_hour = max(hourly_data.items(), key=lambda x: x[1]['count'])
-    best_spread_hour = max(hourly_data.items(), key=lambda x: x[1]['avg_spread'])
+    # Mejor hora: la primera que alcanza cada máximo
+    best_hour = next(row for row in results if row['count'] == best_count)
+    best_spread_hour = next(row for row in results if row['avg_spread'] == best_spread)
     
-    print(f"{Fore.WHITE}{'Hora':<10} {'Oportunidades':<15} {'Spread Prom':<15} {'Spread Máx':<15}")
-    print(f"{Fore.CYAN}{'-'*60}")
+    lines.append(f"{Fore.WHITE}{'Hora':<10} {'Oportunidades':<15} {'Spread Prom':<15} {'Spread Máx':<15}")
+    lines.append(f"{Fore.CYAN}{'-'*60}")
     
-    for hour in range(24):
-        if hour in hourly_data:
-            data = hourly_data[hour]
-            
+    for row in results:
+        hour = row['k1']
+        count = row['count']
+        
+        if count:
             # Colorear según cantidad de oportunidades
-            if data['count'] >= best_hour[1]['count'] * 0.8:
-                color = Fore.GREEN
-                icon = "🔥"
-            elif data['count'] >= best_hour[1]['count'] * 0.5:
-                color = Fore.YELLOW
-                icon = "⭐"
+            if count >= best_count * 0.8:
+                template = HOUR_ROW_TEMPLATES[0]
+            elif count >= best_count * 0.5:
+                template = HOUR_ROW_TEMPLATES[1]
             else:
-                color = Fore.WHITE
-                icon = "  "
+                template = HOUR_ROW_TEMPLATES[2]
             
-            hour_str = f"{hour:02d}:00"
-            print(f"{color}{icon} {hour_str:<8} {data['count']:<15} "
-                  f"{data['avg_spread']:.2f}%{' '*9} {data['max_spread']:.2f}%")
+            lines.append(template % ("%02d:00" % hour, count, row['avg_spread'], row['max_spread']))
         else:
-            print(f"{Fore.LIGHTBLACK_EX}   {hour:02d}:00    0               -               -")
-    
-    print(f"\n{Fore.GREEN}📊 RESUMEN:")
-    print(f"{Fore.WHITE}🏆 Mejor hora (más oportunidades): {Fore.GREEN}{best_hour[0]:02d}:00 "
-          f"{Fore.WHITE}con {Fore.CYAN}{best_hour[1]['count']} oportunidades")
-    print(f"{Fore.WHITE}💰 Mejor hora (spread promedio): {Fore.GREEN}{best_spread_hour[0]:02d}:00 "
-          f"{Fore.WHITE}con {Fore.CYAN}{best_spread_hour[1]['avg_spread']:.2f}% spread")
-    print()
+            lines.append(EMPTY_HOUR_ROW % hour)
+    
+    lines.append(f"\n{Fore.GREEN}📊 RESUMEN:")
+    lines.append(f"{Fore.WHITE}🏆 Mejor hora (más oportunidades): {Fore.GREEN}{best_hour['k1']:02d}:00 "
+                 f"{Fore.WHITE}con {Fore.CYAN}{best_count} oportunidades")
+    lines.append(f"{Fore.WHITE}💰 Mejor hora (spread promedio): {Fore.GREEN}{best_spread_hour['k1']:02d}:00 "
+                 f"{Fore.WHITE}con {Fore.CYAN}{best_spread:.2f}% spread")
+    lines.append("")
+    _write_lines(lines)
 
-def analyze_by_day_of_week(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 30):
+def analyze_by_day_of_week(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 30, results: Optional[list] = None):
     """Analiza oportunidades por día de la semana"""
     
-    print(f"\n{Fore.CYAN}{'='*80}")
-    print(f"{Fore.GREEN}📅 ANÁLISIS POR DÍA DE LA SEMANA - {fiat}")
-    print(f"{Fore.CYAN}Últimos {days} días")
-    print(f"{Fore.CYAN}{'='*80}\n")
-    
-    since_date = datetime.now() - timedelta(days=days)
+    lines = []
+    lines.append(f"\n{Fore.CYAN}{'='*80}")
+    lines.append(f"{Fore.GREEN}📅 ANÁLISIS POR DÍA DE LA SEMANA - {fiat}")
+    lines.append(f"{Fore.CYAN}Últimos {days} días")
+    lines.append(f"{Fore.CYAN}{'='*80}\n")
     
-    cursor = db.conn.cursor()
-    results = cursor.execute("""
-        SELECT 
-            CAST(strftime('%w', timestamp) AS INTEGER) as day_of_week,
-            COUNT(*) as count,
-            AVG(spread_percentage) as avg_spread,
-            MAX(spread_percentage) as max_spread
-        FROM opportunities
-        WHERE fiat = ? AND timestamp >= ?
-        GROUP BY day_of_week
-        ORDER BY day_of_week
-    """, (fiat, since_date)).fetchall()
+    if results is None:
+        results = fetch_time_buckets(db, fiat, days, kinds=('d',))['d']
     
     if not results:
-        print(f"{Fore.YELLOW}⚠️  No hay datos suficientes\n")
+        lines.append(f"{Fore.YELLOW}⚠️  No hay datos suficientes\n")
+        _write_lines(lines)
         return
     
     days_names = {
@@ -118,171 +246,120 @@ def analyze_by_day_of_week(db: ArbitrageDatabase, fiat: str = "PEN", days: int =
     }
     
     # Convertir a diccionario
-    daily_data = {int(row['day_of_week']): dict(row) for row in results}
+    daily_data = {row['k1']: dict(row) for row in results}
     
     # Encontrar mejor día
     best_day = max(daily_data.items(), key=lambda x: x[1]['count'])
     
-    print(f"{Fore.WHITE}{'Día':<15} {'Oportunidades':<15} {'Spread Prom':<15} {'Spread Máx':<15}")
-    print(f"{Fore.CYAN}{'-'*65}")
+    lines.append(f"{Fore.WHITE}{'Día':<15} {'Oportunidades':<15} {'Spread Prom':<15} {'Spread Máx':<15}")
+    lines.append(f"{Fore.CYAN}{'-'*65}")
     
     for day_num in range(7):
         if day_num in daily_data:
             data = daily_data[day_num]
             
             if day_num == best_day[0]:
-                color = Fore.GREEN
-                icon = "🏆"
+                template = DAY_ROW_TEMPLATES[0]
             elif data['count'] >= best_day[1]['count'] * 0.7:
-                color = Fore.YELLOW
-                icon = "⭐"
+                template = DAY_ROW_TEMPLATES[1]
             else:
-                color = Fore.WHITE
-                icon = "  "
+                template = DAY_ROW_TEMPLATES[2]
             
-            print(f"{color}{icon} {days_names[day_num]:<13} {data['count']:<15} "
-                  f"{data['avg_spread']:.2f}%{' '*9} {data['max_spread']:.2f}%")
+            lines.append(template % (days_names[day_num], data['count'], data['avg_spread'], data['max_spread']))
         else:
-            print(f"{Fore.LIGHTBLACK_EX}   {days_names[day_num]:<13} 0               -               -")
+            lines.append(EMPTY_DAY_ROW % days_names[day_num])
     
-    print(f"\n{Fore.GREEN}📊 RESUMEN:")
-    print(f"{Fore.WHITE}🏆 Mejor día: {Fore.GREEN}{days_names[best_day[0]]} "
-          f"{Fore.WHITE}con {Fore.CYAN}{best_day[1]['count']} oportunidades")
-    print()
+    lines.append(f"\n{Fore.GREEN}📊 RESUMEN:")
+    lines.append(f"{Fore.WHITE}🏆 Mejor día: {Fore.GREEN}{days_names[best_day[0]]} "
+                 f"{Fore.WHITE}con {Fore.CYAN}{best_day[1]['count']} oportunidades")
+    lines.append("")
+    _write_lines(lines)
 
-def analyze_by_time_ranges(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7):
+def analyze_by_time_ranges(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7, results: Optional[list] = None):
     """Analiza oportunidades por rangos de tiempo del día"""
     
-    print(f"\n{Fore.CYAN}{'='*80}")
-    print(f"{Fore.GREEN}🕐 ANÁLISIS POR RANGO HORARIO - {fiat}")
-    print(f"{Fore.CYAN}Últimos {days} días")
-    print(f"{Fore.CYAN}{'='*80}\n")
+    lines = []
+    lines.append(f"\n{Fore.CYAN}{'='*80}")
+    lines.append(f"{Fore.GREEN}🕐 ANÁLISIS POR RANGO HORARIO - {fiat}")
+    lines.append(f"{Fore.CYAN}Últimos {days} días")
+    lines.append(f"{Fore.CYAN}{'='*80}\n")
     
-    since_date = datetime.now() - timedelta(days=days)
-    
-    cursor = db.conn.cursor()
-    results = cursor.execute("""
-        SELECT 
-            CASE 
-                WHEN CAST(strftime('%H', timestamp) AS INTEGER) BETWEEN 0 AND 5 THEN 'Madrugada (00:00-05:59)'
-                WHEN CAST(strftime('%H', timestamp) AS INTEGER) BETWEEN 6 AND 11 THEN 'Mañana (06:00-11:59)'
-                WHEN CAST(strftime('%H', timestamp) AS INTEGER) BETWEEN 12 AND 17 THEN 'Tarde (12:00-17:59)'
-                ELSE 'Noche (18:00-23:59)'
-            END as time_range,
-            COUNT(*) as count,
-            AVG(spread_percentage) as avg_spread,
-            MAX(spread_percentage) as max_spread
-        FROM opportunities
-        WHERE fiat = ? AND timestamp >= ?
-        GROUP BY time_range
-        ORDER BY 
-            CASE time_range
-                WHEN 'Madrugada (00:00-05:59)' THEN 1
-                WHEN 'Mañana (06:00-11:59)' THEN 2
-                WHEN 'Tarde (12:00-17:59)' THEN 3
-                ELSE 4
-            END
-    """, (fiat, since_date)).fetchall()
+    if results is None:
+        results = fetch_time_buckets(db, fiat, days, kinds=('r',))['r']
     
     if not results:
-        print(f"{Fore.YELLOW}⚠️  No hay datos suficientes\n")
+        lines.append(f"{Fore.YELLOW}⚠️  No hay datos suficientes\n")
+        _write_lines(lines)
         return
     
-    print(f"{Fore.WHITE}{'Rango Horario':<25} {'Oportunidades':<15} {'Spread Prom':<15}")
-    print(f"{Fore.CYAN}{'-'*60}")
+    lines.append(f"{Fore.WHITE}{'Rango Horario':<25} {'Oportunidades':<15} {'Spread Prom':<15}")
+    lines.append(f"{Fore.CYAN}{'-'*60}")
     
     for row in results:
         count = row['count']
-        avg_spread = row['avg_spread']
         
         # Determinar color según cantidad
         if count >= 50:
-            color = Fore.GREEN
-            icon = "🔥"
+            template = RANGE_ROW_TEMPLATES[0]
         elif count >= 20:
-            color = Fore.YELLOW
-            icon = "⭐"
+            template = RANGE_ROW_TEMPLATES[1]
         else:
-            color = Fore.WHITE
-            icon = "💡"
+            template = RANGE_ROW_TEMPLATES[2]
         
-        print(f"{color}{icon} {row['time_range']:<23} {count:<15} {avg_spread:.2f}%")
+        lines.append(template % (TIME_RANGES[row['k1']], count, row['avg_spread']))
     
-    print()
+    lines.append("")
+    _write_lines(lines)
 
-def analyze_hourly_heatmap(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7):
+def analyze_hourly_heatmap(db: ArbitrageDatabase, fiat: str = "PEN", days: int = 7, results: Optional[list] = None):
     """Crea un mapa de calor de oportunidades por hora y día"""
     
-    print(f"\n{Fore.CYAN}{'='*80}")
-    print(f"{Fore.GREEN}🗓️  MAPA DE CALOR: HORA × DÍA - {fiat}")
-    print(f"{Fore.CYAN}Últimos {days} días")
-    print(f"{Fore.CYAN}{'='*80}\n")
+    lines = []
+    lines.append(f"\n{Fore.CYAN}{'='*80}")
+    lines.append(f"{Fore.GREEN}🗓️  MAPA DE CALOR: HORA × DÍA - {fiat}")
+    lines.append(f"{Fore.CYAN}Últimos {days} días")
+    lines.append(f"{Fore.CYAN}{'='*80}\n")
     
-    since_date = datetime.now() - timedelta(days=days)
-    
-    cursor = db.conn.cursor()
-    results = cursor.execute("""
-        SELECT 
-            CAST(strftime('%w', timestamp) AS INTEGER) as day_of_week,
-            CAST(strftime('%H', timestamp) AS INTEGER) as hour,
-            COUNT(*) as count
-        FROM opportunities
-        WHERE fiat = ? AND timestamp >= ?
-        GROUP BY day_of_week, hour
-    """, (fiat, since_date)).fetchall()
+    if results is None:
+        results = fetch_time_buckets(db, fiat, days, kinds=('hd',))['hd']
     
     if not results:
-        print(f"{Fore.YELLOW}⚠️  No hay datos suficientes\n")
+        lines.append(f"{Fore.YELLOW}⚠️  No hay datos suficientes\n")
+        _write_lines(lines)
         return
     
-    # Crear matriz
-    heatmap = defaultdict(lambda: defaultdict(int))
-    max_count = 0
-    
+    # Matriz fija 7 días × 24 horas (las celdas sin filas quedan en 0)
+    heatmap = [[0] * 24 for _ in range(7)]
     for row in results:
-        day = row['day_of_week']
-        hour = row['hour']
-        count = row['count']
-        heatmap[day][hour] = count
-        max_count = max(max_count, count)
+        heatmap[row['k1']][row['k2']] = row['count']
+    
+    max_count = results[0]['best_count']
+    
+    # Umbrales enteros (20%, 40% y 70% del máximo): para conteos enteros,
+    # count >= ceil(x) equivale a count >= x
+    t_low = math.ceil(max_count * 0.2)
+    t_mid = math.ceil(max_count * 0.4)
+    t_high = math.ceil(max_count * 0.7)
     
-    days_abbr = ["Dom", "Lun", "Mar", "Mié", "Jue", "Vie", "Sáb"]
+    # Prefijo coloreado de cada fila (día)
+    day_prefixes = [f"{Fore.CYAN}{abbr} " for abbr in ("Dom", "Lun", "Mar", "Mié", "Jue", "Vie", "Sáb")]
     
     # Encabezado
-    print(f"{Fore.WHITE}     ", end="")
-    for hour in range(0, 24, 3):
-        print(f"{hour:02d}h  ", end="")
-    print()
+    lines.append(f"{Fore.WHITE}     " + "".join(f"{hour:02d}h  " for hour in range(0, 24, 3)))
     
     # Filas por día
     for day in range(7):
-        print(f"{Fore.CYAN}{days_abbr[day]} ", end="")
+        cells = [day_prefixes[day]]
         
         for hour in range(0, 24, 3):
             count = heatmap[day][hour]
-            
-            if count == 0:
-                symbol = "·"
-                color = Fore.LIGHTBLACK_EX
-            elif count >= max_count * 0.7:
-                symbol = "█"
-                color = Fore.GREEN
-            elif count >= max_count * 0.4:
-                symbol = "▓"
-                color = Fore.YELLOW
-            elif count >= max_count * 0.2:
-                symbol = "▒"
-                color = Fore.WHITE
-            else:
-                symbol = "░"
-                color = Fore.LIGHTBLACK_EX
-            
-            print(f"{color}{symbol}    ", end="")
-        print()
+            cells.append(HEATMAP_CELLS[(count >= 1) + (count >= t_low) + (count >= t_mid) + (count >= t_high)])
+        lines.append("".join(cells))
     
-    print(f"\n{Fore.WHITE}Leyenda: {Fore.LIGHTBLACK_EX}· = 0  {Fore.WHITE}░ = Bajo  "
-          f"{Fore.YELLOW}▒ = Medio  {Fore.YELLOW}▓ = Alto  {Fore.GREEN}█ = Muy Alto")
-    print()
+    lines.append(f"\n{Fore.WHITE}Leyenda: {Fore.LIGHTBLACK_EX}· = 0  {Fore.WHITE}░ = Bajo  "
+                 f"{Fore.YELLOW}▒ = Medio  {Fore.YELLOW}▓ = Alto  {Fore.GREEN}█ = Muy Alto")
+    lines.append("")
+    _write_lines(lines)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -339,7 +416,7 @@ Ejemplos de uso:
     
     # Abrir base de datos
     try:
-        db = ArbitrageDatabase(args.db_path)
+        db = ArbitrageDatabase(db_path=args.db_path, readonly=True)
     except Exception as e:
         print(f"{Fore.RED}❌ Error al abrir base de datos: {e}")
         print(f"{Fore.YELLOW}💡 Ejecuta el monitor con --save-db primero")
@@ -363,11 +440,13 @@ Ejemplos de uso:
     elif args.heatmap_only:
         analyze_hourly_heatmap(db, args.fiat, args.days)
     else:
-        # Mostrar todo
-        analyze_by_hour(db, args.fiat, args.days)
-        analyze_by_day_of_week(db, args.fiat, min(args.days, 30))
-        analyze_by_time_ranges(db, args.fiat, args.days)
-        analyze_hourly_heatmap(db, args.fiat, args.days)
+        # Mostrar todo (las cuatro agregaciones en una sola lectura del corte)
+        day_days = min(args.days, 30)
+        buckets = fetch_time_buckets(db, args.fiat, args.days, day_days)
+        analyze_by_hour(db, args.fiat, args.days, results=buckets['h'])
+        analyze_by_day_of_week(db, args.fiat, day_days, results=buckets['d'])
+        analyze_by_time_ranges(db, args.fiat, args.days, results=buckets['r'])
+        analyze_hourly_heatmap(db, args.fiat, args.days, results=buckets['hd'])
     
     db.close()
 
@@ -6,40 +6,198 @@ Muestra las comisiones de retiro por exchange, criptomoneda y red
 
 import requests
 import json
-from typing import Dict, Optional
+import time
+import math
+import hashlib
+from pathlib import Path
+from itertools import groupby
+from operator import attrgetter
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
 from colorama import init, Fore, Style
 import argparse
 
+# orjson parsea el payload de comisiones bastante más rápido; si no está
+# instalado se usa el módulo json estándar (ambos aceptan bytes)
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 # Inicializar colorama
 init(autoreset=True)
 
+# Una comisión de retiro: exchange, moneda, red y monto
+FeeRow = namedtuple('FeeRow', ['exchange', 'coin', 'network', 'fee'])
+
+def fee_value(fee) -> float:
+    """
+    Valor numérico de una comisión para ordenar
+    
+    La API entrega números o textos numéricos; lo que no se puede convertir
+    (o no es finito) vale infinito y queda al final.
+    """
+    try:
+        value = float(fee)
+    except (TypeError, ValueError):
+        return math.inf
+    return value if math.isfinite(value) else math.inf
+
 class FeeAnalyzer:
     """Analizador de comisiones de CriptoYa"""
     
     BASE_URL = "https://criptoya.com/api"
+    CACHE_DIR = Path("~/.cache/fee_analyzer").expanduser()
+    CACHE_MAX_AGE = 3600  # segundos en que la copia local se usa sin consultar la API
     
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'CriptoYa Fee Analyzer/1.0'
         })
+        self.use_cache = use_cache
+        
+        # Último payload en memoria (y cuándo se obtuvo) y sus filas aplanadas,
+        # para no volver a leer ni aplanar al usar el analizador en un bucle
+        self._fees = None
+        self._fees_at = 0.0
+        self._rows = None
+        self._rows_source = None
+    
+    def _cache_paths(self, url: str) -> Tuple[Path, Path]:
+        """Rutas del cuerpo y de los metadatos (ETag, Last-Modified, fecha) para una URL"""
+        key = hashlib.blake2b(url.encode(), digest_size=8).hexdigest()
+        return self.CACHE_DIR / f"{key}.body", self.CACHE_DIR / f"{key}.meta.json"
+    
+    def _load_cache(self, url: str) -> Tuple[Optional[Dict], Optional[bytes]]:
+        """Lee la copia local de una URL; (None, None) si no existe o está dañada"""
+        body_path, meta_path = self._cache_paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+            if meta.get('url') != url:
+                return None, None
+            return meta, body_path.read_bytes()
+        except (OSError, ValueError):
+            return None, None
+    
+    def _save_cache(self, url: str, response: requests.Response):
+        """Guarda el cuerpo crudo y los validadores de la respuesta (sin fallar si no se puede)"""
+        body_path, meta_path = self._cache_paths(url)
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time()
+        }
+        try:
+            self.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            body_path.write_bytes(response.content)
+            meta_path.write_text(json.dumps(meta))
+        except OSError:
+            pass
+    
+    def _touch_cache(self, url: str, meta: Dict):
+        """Renueva la fecha de la copia local tras un 304"""
+        meta['fetched_at'] = time.time()
+        try:
+            self._cache_paths(url)[1].write_text(json.dumps(meta))
+        except OSError:
+            pass
     
     def get_fees(self) -> Optional[Dict]:
         """
         Obtiene todas las comisiones de retiro
         
+        Dentro de CACHE_MAX_AGE devuelve el mismo diccionario ya cargado en
+        memoria, así las filas aplanadas de _fee_rows siguen siendo válidas.
+        
         Returns:
             Diccionario con comisiones por exchange
         """
+        if self.use_cache and self._fees is not None and time.time() - self._fees_at < self.CACHE_MAX_AGE:
+            return self._fees
+        
+        fees = self._load_fees()
+        if fees is not None:
+            self._fees = fees
+            self._fees_at = time.time()
+        return fees
+    
+    def _load_fees(self) -> Optional[Dict]:
+        """
+        Lee las comisiones de la copia en disco o de la API
+        
+        El payload es grande y cambia poco: se guarda en disco y, pasado
+        CACHE_MAX_AGE, se revalida con If-None-Match / If-Modified-Since; ante
+        un 304 se reutiliza el cuerpo guardado. Si la API falla se usa la
+        última copia disponible.
+        
+        Returns:
+            Diccionario con comisiones por exchange (None si no se pudo obtener)
+        """
         url = f"{self.BASE_URL}/fees"
+        meta, body = self._load_cache(url) if self.use_cache else (None, None)
+        
+        if meta and time.time() - meta.get('fetched_at', 0) < self.CACHE_MAX_AGE:
+            try:
+                return json_loads(body)
+            except ValueError:
+                meta, body = None, None
+        
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
         
         try:
-            response = self.session.get(url, timeout=10)
+            response = self.session.get(url, headers=headers, timeout=10)
+            if response.status_code == 304 and meta:
+                self._touch_cache(url, meta)
+                return json_loads(body)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            fees = json_loads(response.content)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            if body is not None:
+                print(f"{Fore.YELLOW}⚠️  Error al obtener comisiones ({e}); usando copia local")
+                try:
+                    return json_loads(body)
+                except ValueError:
+                    pass
             print(f"{Fore.RED}Error al obtener comisiones: {e}")
             return None
+        
+        if self.use_cache:
+            self._save_cache(url, response)
+        return fees
+    
+    @staticmethod
+    def _flatten(fees: Dict) -> List[FeeRow]:
+        """
+        Aplana fees en filas (exchange, moneda, red, comisión)
+        
+        Es el único recorrido del diccionario anidado: descarta las entradas
+        que no son diccionarios de redes y ordena una sola vez por exchange,
+        moneda y red. Las vistas filtran y agrupan sobre estas filas.
+        """
+        return sorted(
+            (
+                FeeRow(exchange, coin, network, fee)
+                for exchange, coins in fees.items()
+                for coin, networks in coins.items() if isinstance(networks, dict)
+                for network, fee in networks.items()
+            ),
+            key=lambda row: (row.exchange, row.coin, row.network)
+        )
+    
+    def _fee_rows(self, fees: Dict) -> List[FeeRow]:
+        """Filas aplanadas de `fees`, recalculadas solo cuando cambia el payload"""
+        if fees is not self._rows_source:
+            self._rows = self._flatten(fees)
+            self._rows_source = fees
+        return self._rows
     
     def display_all_fees(self, fees: Dict):
         """Muestra todas las comisiones de forma organizada"""
@@ -47,16 +205,15 @@ class FeeAnalyzer:
         print(f"{Fore.GREEN}📊 COMISIONES DE RETIRO POR EXCHANGE")
         print(f"{Fore.CYAN}{'='*80}\n")
         
-        for exchange, coins in sorted(fees.items()):
+        for exchange, exchange_rows in groupby(self._fee_rows(fees), key=attrgetter('exchange')):
             print(f"{Fore.YELLOW}🏦 {exchange}")
             print(f"{Fore.CYAN}{'-'*80}")
             
-            for coin, networks in sorted(coins.items()):
-                if isinstance(networks, dict):
-                    print(f"  {Fore.WHITE}💰 {coin}")
-                    for network, fee in sorted(networks.items()):
-                        print(f"     {Fore.GREEN}├─ {network:<15} {Fore.MAGENTA}{fee} {coin}")
-                    print()
+            for coin, rows in groupby(exchange_rows, key=attrgetter('coin')):
+                print(f"  {Fore.WHITE}💰 {coin}")
+                for row in rows:
+                    print(f"     {Fore.GREEN}├─ {row.network:<15} {Fore.MAGENTA}{row.fee} {coin}")
+                print()
             print()
     
     def display_coin_fees(self, fees: Dict, coin: str):
@@ -68,13 +225,13 @@ class FeeAnalyzer:
         print(f"{Fore.CYAN}{'='*80}\n")
         
         found = False
-        for exchange, coins in sorted(fees.items()):
-            if coin in coins and isinstance(coins[coin], dict):
-                found = True
-                print(f"{Fore.YELLOW}🏦 {exchange}")
-                for network, fee in sorted(coins[coin].items()):
-                    print(f"   {Fore.GREEN}├─ {network:<15} {Fore.MAGENTA}{fee} {coin}")
-                print()
+        coin_rows = (row for row in self._fee_rows(fees) if row.coin == coin)
+        for exchange, rows in groupby(coin_rows, key=attrgetter('exchange')):
+            found = True
+            print(f"{Fore.YELLOW}🏦 {exchange}")
+            for row in rows:
+                print(f"   {Fore.GREEN}├─ {row.network:<15} {Fore.MAGENTA}{row.fee} {coin}")
+            print()
         
         if not found:
             print(f"{Fore.RED}No se encontraron comisiones para {coin}")
@@ -100,12 +257,12 @@ class FeeAnalyzer:
         print(f"{Fore.GREEN}🏦 COMISIONES DE {exchange_name}")
         print(f"{Fore.CYAN}{'='*80}\n")
         
-        for coin, networks in sorted(exchange_data.items()):
-            if isinstance(networks, dict):
-                print(f"{Fore.WHITE}💰 {coin}")
-                for network, fee in sorted(networks.items()):
-                    print(f"   {Fore.GREEN}├─ {network:<15} {Fore.MAGENTA}{fee} {coin}")
-                print()
+        exchange_rows = (row for row in self._fee_rows(fees) if row.exchange == exchange_name)
+        for coin, rows in groupby(exchange_rows, key=attrgetter('coin')):
+            print(f"{Fore.WHITE}💰 {coin}")
+            for row in rows:
+                print(f"   {Fore.GREEN}├─ {row.network:<15} {Fore.MAGENTA}{row.fee} {coin}")
+            print()
     
     def compare_network_fees(self, fees: Dict, coin: str, network: str):
         """Compara comisiones de una red específica entre exchanges"""
@@ -116,20 +273,17 @@ class FeeAnalyzer:
         print(f"{Fore.GREEN}🔍 COMPARACIÓN DE COMISIONES: {coin} en red {network}")
         print(f"{Fore.CYAN}{'='*80}\n")
         
-        results = []
-        
-        for exchange, coins in fees.items():
-            if coin in coins and isinstance(coins[coin], dict):
-                if network in coins[coin]:
-                    fee = coins[coin][network]
-                    results.append((exchange, fee))
+        results = [
+            (row.exchange, row.fee) for row in self._fee_rows(fees)
+            if row.coin == coin and row.network == network
+        ]
         
         if not results:
             print(f"{Fore.RED}No se encontraron comisiones para {coin} en red {network}")
             return
         
-        # Ordenar por comisión (menor a mayor)
-        results.sort(key=lambda x: float(x[1]) if isinstance(x[1], (int, float)) else 0)
+        # Ordenar por comisión (menor a mayor); las no numéricas al final
+        results.sort(key=lambda x: fee_value(x[1]))
         
         print(f"{Fore.WHITE}{'Exchange':<30} {'Comisión':<20}")
         print(f"{Fore.CYAN}{'-'*50}")
@@ -190,9 +344,15 @@ Ejemplos de uso:
         help='Mostrar resultado en formato JSON'
     )
     
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Descargar las comisiones sin usar ni guardar la copia local'
+    )
+    
     args = parser.parse_args()
     
-    analyzer = FeeAnalyzer()
+    analyzer = FeeAnalyzer(use_cache=not args.no_cache)
     fees = analyzer.get_fees()
     
     if not fees:
@@ -4,122 +4,196 @@ Script para inicializar la base de datos en Railway
 Crea la base de datos y las tablas necesarias
 """
 import os
+import io
+import csv
 from dotenv import load_dotenv
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from psycopg2.extras import execute_values
 
 load_dotenv()
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
-if not DATABASE_URL:
-    print("❌ No se encontró DATABASE_URL")
-    exit(1)
-
-print("🔧 Inicializando base de datos en Railway...")
-
-# Conectar al servidor PostgreSQL (sin especificar base de datos)
-try:
-    # Extraer componentes de la URL
-    import re
-    match = re.match(r'postgresql://([^:]+):([^@]+)@([^:]+):(\d+)/(.+)', DATABASE_URL)
-    if not match:
-        print("❌ DATABASE_URL inválida")
-        exit(1)
+# Esquema avanzado completo: psycopg2 envía las sentencias separadas por ';'
+# en una sola llamada y quedan dentro de la misma transacción (un solo commit)
+SCHEMA_DDL = """
+    CREATE TABLE IF NOT EXISTS market_snapshots (
+        id SERIAL PRIMARY KEY,
+        timestamp TIMESTAMP NOT NULL,
+        coin VARCHAR(20) NOT NULL,
+        fiat VARCHAR(10) NOT NULL,
+        volume DECIMAL(20, 8) NOT NULL,
+        snapshot_hash VARCHAR(64) UNIQUE,
+        num_exchanges INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
     
-    user, password, host, port, dbname = match.groups()
+    CREATE TABLE IF NOT EXISTS exchange_quotes (
+        id SERIAL PRIMARY KEY,
+        snapshot_id INTEGER REFERENCES market_snapshots(id) ON DELETE CASCADE,
+        exchange VARCHAR(100) NOT NULL,
+        ask DECIMAL(20, 8),
+        bid DECIMAL(20, 8),
+        total_ask DECIMAL(20, 8),
+        total_bid DECIMAL(20, 8),
+        api_timestamp BIGINT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
     
-    # Conectar al servidor (base de datos 'postgres' por defecto)
-    conn = psycopg2.connect(
-        host=host,
-        port=port,
-        user=user,
-        password=password,
-        database='postgres'  # Conectar a la BD por defecto
-    )
-    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-    cursor = conn.cursor()
+    CREATE TABLE IF NOT EXISTS arbitrage_opportunities (
+        id SERIAL PRIMARY KEY,
+        snapshot_id INTEGER REFERENCES market_snapshots(id) ON DELETE CASCADE,
+        buy_exchange VARCHAR(100) NOT NULL,
+        sell_exchange VARCHAR(100) NOT NULL,
+        buy_price DECIMAL(20, 8) NOT NULL,
+        sell_price DECIMAL(20, 8) NOT NULL,
+        spread_percentage DECIMAL(10, 4) NOT NULL,
+        profit_per_unit DECIMAL(20, 8) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
     
-    # Verificar si la base de datos existe
-    cursor.execute(f"SELECT 1 FROM pg_database WHERE datname = '{dbname}'")
-    exists = cursor.fetchone()
+    CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON market_snapshots(timestamp);
+    CREATE INDEX IF NOT EXISTS idx_snapshots_coin_fiat ON market_snapshots(coin, fiat);
+    CREATE INDEX IF NOT EXISTS idx_quotes_snapshot ON exchange_quotes(snapshot_id);
+    CREATE INDEX IF NOT EXISTS idx_quotes_exchange ON exchange_quotes(exchange);
+    CREATE INDEX IF NOT EXISTS idx_opps_snapshot ON arbitrage_opportunities(snapshot_id);
+    CREATE INDEX IF NOT EXISTS idx_opps_exchanges ON arbitrage_opportunities(buy_exchange, sell_exchange);
     
-    if exists:
-        print(f"✓ Base de datos '{dbname}' ya existe")
-    else:
-        print(f"📝 Creando base de datos '{dbname}'...")
-        cursor.execute(f'CREATE DATABASE "{dbname}"')
-        print(f"✅ Base de datos '{dbname}' creada exitosamente")
+    -- Últimas oportunidades (ORDER BY created_at DESC LIMIT n): el índice se
+    -- lee en orden y se detiene en n filas, sin ordenar la tabla completa
+    CREATE INDEX IF NOT EXISTS idx_opps_created_desc ON arbitrage_opportunities(created_at DESC);
     
-    cursor.close()
-    conn.close()
+    -- Índice parcial para consultas de spreads altos (spread > 0.5%, ordenadas
+    -- de mayor a menor, ver get_top_spreads en arbitrage_db_advanced.py):
+    -- solo indexa la fracción rentable de la tabla
+    CREATE INDEX IF NOT EXISTS idx_opps_high_spread
+        ON arbitrage_opportunities(spread_percentage DESC)
+        WHERE spread_percentage > 0.5;
     
-    # Ahora conectar a la base de datos específica y crear tablas
-    print(f"\n🔧 Creando tablas en '{dbname}'...")
-    conn = psycopg2.connect(DATABASE_URL)
-    cursor = conn.cursor()
+    -- Estadísticas al día para que el planificador considere los índices nuevos
+    ANALYZE arbitrage_opportunities;
+"""
+
+QUOTE_COLUMNS = "snapshot_id, exchange, ask, bid, total_ask, total_bid, api_timestamp"
+
+def bulk_insert_quotes(cursor, rows, page_size: int = 1000) -> int:
+    """
+    Inserta cotizaciones en exchange_quotes por lotes
     
-    # Crear tablas del esquema avanzado
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS market_snapshots (
-            id SERIAL PRIMARY KEY,
-            timestamp TIMESTAMP NOT NULL,
-            coin VARCHAR(20) NOT NULL,
-            fiat VARCHAR(10) NOT NULL,
-            volume DECIMAL(20, 8) NOT NULL,
-            snapshot_hash VARCHAR(64) UNIQUE,
-            num_exchanges INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    execute_values arma un INSERT multi-fila por cada `page_size` filas, en
+    lugar de un INSERT (y un viaje al servidor) por cotización. El commit
+    queda a cargo de quien llama.
     
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS exchange_quotes (
-            id SERIAL PRIMARY KEY,
-            snapshot_id INTEGER REFERENCES market_snapshots(id) ON DELETE CASCADE,
-            exchange VARCHAR(100) NOT NULL,
-            ask DECIMAL(20, 8),
-            bid DECIMAL(20, 8),
-            total_ask DECIMAL(20, 8),
-            total_bid DECIMAL(20, 8),
-            api_timestamp BIGINT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    Args:
+        cursor: Cursor de psycopg2
+        rows: Tuplas (snapshot_id, exchange, ask, bid, total_ask, total_bid, api_timestamp)
     
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS arbitrage_opportunities (
-            id SERIAL PRIMARY KEY,
-            snapshot_id INTEGER REFERENCES market_snapshots(id) ON DELETE CASCADE,
-            buy_exchange VARCHAR(100) NOT NULL,
-            sell_exchange VARCHAR(100) NOT NULL,
-            buy_price DECIMAL(20, 8) NOT NULL,
-            sell_price DECIMAL(20, 8) NOT NULL,
-            spread_percentage DECIMAL(10, 4) NOT NULL,
-            profit_per_unit DECIMAL(20, 8) NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    Returns:
+        Número de filas enviadas
+    """
+    rows = list(rows)
+    execute_values(
+        cursor,
+        f"INSERT INTO exchange_quotes ({QUOTE_COLUMNS}) VALUES %s",
+        rows,
+        page_size=page_size
+    )
+    return len(rows)
+
+def copy_quotes(cursor, rows) -> int:
+    """
+    Carga cotizaciones en exchange_quotes con COPY FROM STDIN
     
-    # Crear índices
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON market_snapshots(timestamp)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_coin_fiat ON market_snapshots(coin, fiat)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_quotes_snapshot ON exchange_quotes(snapshot_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_quotes_exchange ON exchange_quotes(exchange)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_opps_snapshot ON arbitrage_opportunities(snapshot_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_opps_exchanges ON arbitrage_opportunities(buy_exchange, sell_exchange)")
+    Para lotes grandes es más rápido que bulk_insert_quotes: las filas viajan
+    como CSV en un solo flujo y el servidor no parsea ni planifica un INSERT.
+    Los None se envían como campo vacío, que COPY en CSV interpreta como NULL.
+    El commit queda a cargo de quien llama.
     
-    conn.commit()
-    cursor.close()
-    conn.close()
+    Args:
+        cursor: Cursor de psycopg2
+        rows: Tuplas (snapshot_id, exchange, ask, bid, total_ask, total_bid, api_timestamp)
     
-    print("✅ Tablas creadas exitosamente")
-    print("\n🎉 Base de datos inicializada correctamente")
-    print("\n💡 Ahora puedes:")
-    print("   1. Hacer redeploy en Railway")
-    print("   2. El monitor se conectará automáticamente a PostgreSQL")
+    Returns:
+        Número de filas enviadas
+    """
+    buffer = io.StringIO()
+    count = 0
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    buffer.seek(0)
     
-except Exception as e:
-    print(f"❌ Error: {e}")
-    import traceback
-    traceback.print_exc()
+    cursor.copy_expert(f"COPY exchange_quotes ({QUOTE_COLUMNS}) FROM STDIN WITH (FORMAT csv)", buffer)
+    return count
+
+def main():
+    """Crea la base de datos (si no existe) y el esquema avanzado"""
+    if not DATABASE_URL:
+        print("❌ No se encontró DATABASE_URL")
+        exit(1)
+    
+    print("🔧 Inicializando base de datos en Railway...")
+    
+    # Conectar al servidor PostgreSQL (sin especificar base de datos)
+    try:
+        # Extraer componentes de la URL
+        import re
+        match = re.match(r'postgresql://([^:]+):([^@]+)@([^:]+):(\d+)/(.+)', DATABASE_URL)
+        if not match:
+            print("❌ DATABASE_URL inválida")
+            exit(1)
+        
+        user, password, host, port, dbname = match.groups()
+        
+        # Conectar al servidor (base de datos 'postgres' por defecto)
+        conn = psycopg2.connect(
+            host=host,
+            port=port,
+            user=user,
+            password=password,
+            database='postgres'  # Conectar a la BD por defecto
+        )
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        cursor = conn.cursor()
+        
+        # Verificar si la base de datos existe
+        cursor.execute(f"SELECT 1 FROM pg_database WHERE datname = '{dbname}'")
+        exists = cursor.fetchone()
+        
+        if exists:
+            print(f"✓ Base de datos '{dbname}' ya existe")
+        else:
+            print(f"📝 Creando base de datos '{dbname}'...")
+            cursor.execute(f'CREATE DATABASE "{dbname}"')
+            print(f"✅ Base de datos '{dbname}' creada exitosamente")
+        
+        cursor.close()
+        conn.close()
+        
+        # Ahora conectar a la base de datos específica y crear tablas
+        print(f"\n🔧 Creando tablas en '{dbname}'...")
+        conn = psycopg2.connect(DATABASE_URL)
+        cursor = conn.cursor()
+        
+        # Tablas e índices del esquema avanzado en un solo viaje al servidor
+        cursor.execute(SCHEMA_DDL)
+        
+        conn.commit()
+        cursor.close()
+        conn.close()
+        
+        print("✅ Tablas creadas exitosamente")
+        print("\n🎉 Base de datos inicializada correctamente")
+        print("\n💡 Ahora puedes:")
+        print("   1. Hacer redeploy en Railway")
+        print("   2. El monitor se conectará automáticamente a PostgreSQL")
+        
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    main()
@@ -20,22 +20,28 @@ if not DATABASE_URL:
     print("   DATABASE_URL=postgresql://...")
     exit(1)
 
+# Timeout de conexión y keepalives TCP, igual que en view_data.py
+CONNECT_OPTIONS = {
+    'connect_timeout': 10,
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3
+}
+
 try:
     import psycopg2
     print("✓ psycopg2 instalado")
     
     print(f"\n🔌 Conectando a PostgreSQL...")
-    conn = psycopg2.connect(DATABASE_URL)
+    conn = psycopg2.connect(DATABASE_URL, **CONNECT_OPTIONS)
     print("✅ ¡Conexión exitosa!")
     
     cursor = conn.cursor()
-    cursor.execute("SELECT version();")
-    version = cursor.fetchone()
-    print(f"📊 PostgreSQL version: {version[0]}")
-    
-    cursor.execute("SELECT current_database();")
-    db_name = cursor.fetchone()
-    print(f"💾 Base de datos: {db_name[0]}")
+    cursor.execute("SELECT version(), current_database();")
+    version, db_name = cursor.fetchone()
+    print(f"📊 PostgreSQL version: {version}")
+    print(f"💾 Base de datos: {db_name}")
     
     conn.close()
     print("\n🎉 PostgreSQL está funcionando correctamente")
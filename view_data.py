@@ -3,9 +3,11 @@
 Script para ver datos de la base de datos PostgreSQL
 """
 import os
+import json
+from decimal import Decimal
 from dotenv import load_dotenv
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import register_default_json
 
 load_dotenv()
 
@@ -15,83 +17,107 @@ if not DATABASE_URL:
     print("❌ No se encontró DATABASE_URL en .env")
     exit(1)
 
+# Timeout de conexión y keepalives TCP: una conexión ociosa hacia Railway se
+# detecta caída (o la mantiene viva frente a proxies) en lugar de colgarse
+CONNECT_OPTIONS = {
+    'connect_timeout': 10,
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3
+}
+
 try:
-    conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+    conn = psycopg2.connect(DATABASE_URL, **CONNECT_OPTIONS)
+    # Los números de las secciones JSON se leen como Decimal, igual que NUMERIC
+    register_default_json(conn, loads=lambda s: json.loads(s, parse_float=Decimal))
     cursor = conn.cursor()
     
     print("✅ Conectado a PostgreSQL\n")
     
-    # Ver total de snapshots
-    cursor.execute("SELECT COUNT(*) as count FROM market_snapshots")
-    snapshots = cursor.fetchone()['count']
+    # Todo el reporte en un solo viaje al servidor: totales como subconsultas
+    # escalares y cada listado como un arreglo JSON (json_agg) en su columna
+    cursor.execute("""
+        SELECT 
+            (SELECT COUNT(*) FROM market_snapshots) as snapshots,
+            (SELECT COUNT(*) FROM arbitrage_opportunities) as opps,
+            (SELECT COUNT(*) FROM exchange_quotes) as quotes,
+            (
+                SELECT COALESCE(json_agg(s ORDER BY s.ts DESC), '[]')
+                FROM (
+                    SELECT timestamp as ts, timestamp::text as timestamp, coin, fiat, num_exchanges
+                    FROM market_snapshots
+                    ORDER BY timestamp DESC
+                    LIMIT 5
+                ) s
+            ) as last_snapshots,
+            (
+                SELECT COALESCE(json_agg(o ORDER BY o.ts DESC), '[]')
+                FROM (
+                    SELECT 
+                        ao.created_at as ts,
+                        ao.created_at::text as created_at,
+                        ms.coin,
+                        ms.fiat,
+                        ao.buy_exchange,
+                        ao.sell_exchange,
+                        ao.spread_percentage,
+                        ao.profit_per_unit
+                    FROM arbitrage_opportunities ao
+                    JOIN market_snapshots ms ON ao.snapshot_id = ms.id
+                    ORDER BY ao.created_at DESC
+                    LIMIT 10
+                ) o
+            ) as last_opportunities,
+            (
+                -- Exchanges más activos: compra y venta salen de un solo recorrido
+                -- de la tabla (GROUPING SETS) y ROW_NUMBER corta el top 5 de cada lado
+                SELECT COALESCE(json_agg(t ORDER BY t.side, t.count DESC), '[]')
+                FROM (
+                    SELECT 
+                        CASE WHEN GROUPING(buy_exchange) = 0 THEN 'buy' ELSE 'sell' END as side,
+                        COALESCE(buy_exchange, sell_exchange) as exchange,
+                        COUNT(*) as count,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY GROUPING(buy_exchange) ORDER BY COUNT(*) DESC
+                        ) as rank
+                    FROM arbitrage_opportunities
+                    GROUP BY GROUPING SETS ((buy_exchange), (sell_exchange))
+                ) t
+                WHERE rank <= 5
+            ) as top_exchanges
+    """)
+    snapshots, opps, quotes, last_snapshots, last_opportunities, top_exchanges = cursor.fetchone()
     print(f"📊 Total snapshots: {snapshots}")
-    
-    # Ver total de oportunidades
-    cursor.execute("SELECT COUNT(*) as count FROM arbitrage_opportunities")
-    opps = cursor.fetchone()['count']
     print(f"💰 Total oportunidades: {opps}")
-    
-    # Ver total de cotizaciones
-    cursor.execute("SELECT COUNT(*) as count FROM exchange_quotes")
-    quotes = cursor.fetchone()['count']
     print(f"💱 Total cotizaciones: {quotes}\n")
     
     if snapshots > 0:
         # Ver últimos snapshots
         print("📸 Últimos 5 snapshots:")
-        cursor.execute("""
-            SELECT timestamp, coin, fiat, num_exchanges
-            FROM market_snapshots
-            ORDER BY timestamp DESC
-            LIMIT 5
-        """)
-        for row in cursor.fetchall():
+        for row in last_snapshots:
             print(f"  {row['timestamp']} | {row['coin']}/{row['fiat']} | {row['num_exchanges']} exchanges")
     
     if opps > 0:
         print("\n💡 Últimas 10 oportunidades:")
-        cursor.execute("""
-            SELECT 
-                ao.created_at,
-                ms.coin,
-                ms.fiat,
-                ao.buy_exchange,
-                ao.sell_exchange,
-                ao.spread_percentage,
-                ao.profit_per_unit
-            FROM arbitrage_opportunities ao
-            JOIN market_snapshots ms ON ao.snapshot_id = ms.id
-            ORDER BY ao.created_at DESC
-            LIMIT 10
-        """)
-        for row in cursor.fetchall():
+        for row in last_opportunities:
             print(f"  {row['created_at']} | {row['coin']}/{row['fiat']}")
             print(f"    {row['buy_exchange']} → {row['sell_exchange']}")
             print(f"    Spread: {row['spread_percentage']:.2f}% | Ganancia: {row['profit_per_unit']:.2f} {row['fiat']}\n")
     
     # Ver exchanges más activos
     if opps > 0:
+        top = {'buy': [], 'sell': []}
+        for row in top_exchanges:
+            top[row['side']].append(row)
+        
         print("🏆 Top 5 Exchanges (compra):")
-        cursor.execute("""
-            SELECT buy_exchange, COUNT(*) as count
-            FROM arbitrage_opportunities
-            GROUP BY buy_exchange
-            ORDER BY count DESC
-            LIMIT 5
-        """)
-        for row in cursor.fetchall():
-            print(f"  {row['buy_exchange']}: {row['count']} veces")
+        for row in top['buy']:
+            print(f"  {row['exchange']}: {row['count']} veces")
         
         print("\n🏆 Top 5 Exchanges (venta):")
-        cursor.execute("""
-            SELECT sell_exchange, COUNT(*) as count
-            FROM arbitrage_opportunities
-            GROUP BY sell_exchange
-            ORDER BY count DESC
-            LIMIT 5
-        """)
-        for row in cursor.fetchall():
-            print(f"  {row['sell_exchange']}: {row['count']} veces")
+        for row in top['sell']:
+            print(f"  {row['exchange']}: {row['count']} veces")
     
     conn.close()
     